@@ -0,0 +1,83 @@
+"""
+Async versions of the catalog read endpoints, for ASGI (``config.asgi``).
+
+They answer from the ``CatalogEntry`` read model (banners from the compact
+serializer) with the async ORM, so while the database or a slow client is
+waited on, the worker's event loop goes on serving other requests instead
+of holding a thread per request. The output is the same as the viewsets'
+plain ``list``/``retrieve`` responses; search, pagination and sparse
+fieldsets stay on the regular endpoints.
+"""
+
+from django.http import HttpResponse
+from django.utils.translation import get_language
+from django.views.decorators.http import require_GET
+
+from apps.products.models import Banner, CatalogEntry
+
+from . import catalog
+from .compact import CompactBannerSerializer
+from .renderers import dumps
+
+
+def json_response(text, status=200):
+    return HttpResponse(text, status=status, content_type="application/json")
+
+
+def not_found():
+    return json_response(dumps({"detail": "Not found."}), status=404)
+
+
+def entry_filters(request, allowed=()):
+    """``CatalogEntry`` filters for the query string, ``None`` when it asks for something else."""
+    filters = {}
+    for name, value in request.GET.items():
+        if name not in allowed or not value.isdigit():
+            return None
+        filters[f"{name}_id"] = int(value)
+    return filters
+
+
+async def entry_list(request, kind, allowed=()):
+    filters = entry_filters(request, allowed)
+    if filters is None:
+        return json_response(dumps({"detail": "Unsupported query parameters."}), status=400)
+    texts = await catalog.aentries(kind, get_language(), **filters)
+    if texts is None:
+        return not_found()
+    return json_response(catalog.absolutize(f"[{','.join(texts)}]", request))
+
+
+async def entry_detail(request, kind, pk):
+    try:
+        text = await catalog.entries_queryset(kind, get_language(), object_id=pk).aget()
+    except CatalogEntry.DoesNotExist:
+        return not_found()
+    return json_response(catalog.absolutize(text, request))
+
+
+@require_GET
+async def category_list(request):
+    return await entry_list(request, CatalogEntry.Kind.CATEGORY)
+
+
+@require_GET
+async def category_detail(request, pk):
+    return await entry_detail(request, CatalogEntry.Kind.CATEGORY, pk)
+
+
+@require_GET
+async def product_list(request):
+    return await entry_list(request, CatalogEntry.Kind.PRODUCT, allowed=("category",))
+
+
+@require_GET
+async def product_detail(request, pk):
+    return await entry_detail(request, CatalogEntry.Kind.PRODUCT, pk)
+
+
+@require_GET
+async def banner_list(request):
+    serializer = CompactBannerSerializer(context={"request": request})
+    rows = await serializer.afetch(Banner.objects.all())
+    return json_response(dumps(serializer.represent(rows)))
@@ -0,0 +1,127 @@
+import json
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from apps.products.models import CatalogEntry, Category, Product
+
+from .compact import CompactCategorySerializer, CompactProductSerializer
+from .renderers import dumps
+
+# Stands in front of site-relative media URLs in stored entries; Django
+# rejects NUL in text fields, so it cannot come from catalog content.
+HOST_MARKER = "\x00"
+ESCAPED_HOST_MARKER = json.dumps(HOST_MARKER)[1:-1]
+
+SERIALIZERS = {
+    CatalogEntry.Kind.CATEGORY: (Category, CompactCategorySerializer),
+    CatalogEntry.Kind.PRODUCT: (Product, CompactProductSerializer),
+}
+
+
+class MarkerRequest:
+    """Serializer context ``request`` that leaves the host to be filled in when serving."""
+
+    @staticmethod
+    def build_absolute_uri(location):
+        if location.startswith("/") and not location.startswith("//"):
+            return HOST_MARKER + location
+        return location
+
+
+def absolutize(text: str, request) -> str:
+    return text.replace(ESCAPED_HOST_MARKER, request.build_absolute_uri("/")[:-1])
+
+
+def render(kind, ids, using=DEFAULT_DB_ALIAS) -> list[CatalogEntry]:
+    model, compact_class = SERIALIZERS[kind]
+    languages = [lang for lang, _ in settings.LANGUAGES]
+    compact = compact_class(context={"request": MarkerRequest()})
+    rows = compact.fetch(model.objects.using(using).filter(pk__in=ids), languages)
+    entries = []
+    for lang in languages:
+        for row, data in zip(rows, compact.represent(rows, lang)):
+            entries.append(CatalogEntry(
+                kind=kind,
+                language=lang,
+                object_id=row["id"],
+                category_id=row.get("category_id"),
+                # The API renderer's output, so entries concatenate into a response.
+                data=dumps(data),
+            ))
+    return entries
+
+
+def refresh(kind, ids, using=DEFAULT_DB_ALIAS) -> None:
+    """Re-render the entries of ``ids``; ids that no longer exist lose theirs."""
+    ids = set(ids)
+    if not ids:
+        return
+    entries = render(kind, ids, using)
+    with transaction.atomic(using=using):
+        CatalogEntry.objects.using(using).filter(kind=kind, object_id__in=ids).exclude(
+            object_id__in={entry.object_id for entry in entries},
+        ).delete()
+        CatalogEntry.objects.using(using).bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["kind", "language", "object_id"],
+            update_fields=["category_id", "data"],
+        )
+
+
+_pending = threading.local()
+
+
+def schedule(using, categories=(), products=()) -> None:
+    """
+    Refresh entries once the current transaction commits; writes in the same
+    transaction are collected into one refresh per kind. Products also
+    refresh their current category, whose entry nests them.
+    """
+    pending = _pending.__dict__.setdefault(using, {"categories": set(), "products": set()})
+    pending["categories"].update(pk for pk in categories if pk is not None)
+    pending["products"].update(products)
+    # The first callback to run takes everything collected so far, later ones find nothing.
+    transaction.on_commit(lambda: _run(using), using=using)
+
+
+def _run(using):
+    pending = _pending.__dict__.pop(using, None)
+    if pending is None:
+        return
+    categories = pending["categories"] | set(
+        Product.objects.using(using).filter(pk__in=pending["products"]).exclude(category=None).values_list("category_id", flat=True)
+    )
+    refresh(CatalogEntry.Kind.PRODUCT, pending["products"], using)
+    refresh(CatalogEntry.Kind.CATEGORY, categories, using)
+
+
+def rebuild(using=DEFAULT_DB_ALIAS) -> None:
+    with transaction.atomic(using=using):
+        CatalogEntry.objects.using(using).all().delete()
+        for kind, (model, _) in SERIALIZERS.items():
+            refresh(kind, model.objects.using(using).values_list("pk", flat=True), using)
+
+
+def entries_queryset(kind, lang, **filters):
+    return (
+        CatalogEntry.objects.filter(kind=kind, language=lang, **filters)
+        .order_by("object_id")
+        .values_list("data", flat=True)
+    )
+
+
+def entries(kind, lang, **filters):
+    """Stored JSON texts in API order (by id), or ``None`` for an unknown language."""
+    if lang not in dict(settings.LANGUAGES):
+        return None
+    return list(entries_queryset(kind, lang, **filters))
+
+
+async def aentries(kind, lang, **filters):
+    """``entries`` on the async ORM."""
+    if lang not in dict(settings.LANGUAGES):
+        return None
+    return [text async for text in entries_queryset(kind, lang, **filters).aiterator()]
@@ -0,0 +1,183 @@
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.encoding import filepath_to_uri
+from modeltranslation.utils import get_language
+
+from apps.products.models import Banner, Category, Image, Product
+
+from .localization import annotation_name, annotations
+from .serializers import represent_variants
+
+
+class MediaURLs:
+    """
+    Absolute URLs of stored files, as DRF's file fields render them, with
+    one ``build_absolute_uri`` per storage instead of one per file.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.prefixes = {}
+
+    def absolute(self, url):
+        return self.request.build_absolute_uri(url) if self.request is not None else url
+
+    def __call__(self, name, storage=default_storage):
+        if not name:
+            return None
+        if not isinstance(storage, FileSystemStorage):
+            return self.absolute(storage.url(name))
+        prefix = self.prefixes.get(storage)
+        if prefix is None:
+            prefix = self.prefixes[storage] = self.absolute(storage.base_url)
+        return prefix + filepath_to_uri(name).lstrip("/")
+
+
+class CompactSerializer:
+    """
+    Read-only counterpart of a catalog serializer with its full field set:
+    the same JSON, built from ``values()`` rows without model instances or
+    Field objects.
+
+    ``fetch`` loads the rows, nested ones included, with the translated
+    fields resolved in SQL for ``languages`` (the active one by default).
+    ``represent`` builds the output in the active language, so rows fetched
+    once can be represented in each of them.
+    """
+
+    model = None
+    columns = ()
+    localized = ()
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.url = MediaURLs(self.context.get("request"))
+
+    def values(self, queryset, languages=None):
+        localized = annotations(self.model, self.localized, languages)
+        # The query plan may have annotated the active language already.
+        missing = {name: value for name, value in localized.items() if name not in queryset.query.annotations}
+        return queryset.prefetch_related(None).annotate(**missing).values(*self.columns, *localized)
+
+    def fetch(self, queryset, languages=None) -> list[dict]:
+        rows = list(self.values(queryset, languages))
+        if rows:
+            self.fetch_related(rows, queryset.db, languages)
+        return rows
+
+    async def afetch(self, queryset, languages=None) -> list[dict]:
+        """``fetch`` on the async ORM; nested rows are still fetched in a thread."""
+        rows = [row async for row in self.values(queryset, languages).aiterator()]
+        if rows:
+            await sync_to_async(self.fetch_related)(rows, queryset.db, languages)
+        return rows
+
+    def fetch_related(self, rows, using, languages):
+        pass
+
+    def nest(self, rows, name, compact, queryset, key, languages):
+        """Attach the rows of ``queryset`` whose ``key`` column points at a row to it, as ``name``."""
+        children = defaultdict(list)
+        queryset = queryset.filter(**{f"{key}__in": [row["id"] for row in rows]})
+        for child in compact.fetch(queryset, languages):
+            children[child[key]].append(child)
+        for row in rows:
+            row[name] = children[row["id"]]
+
+    def represent(self, rows, lang=None) -> list[dict]:
+        lang = lang or get_language()
+        return [self.represent_row(row, lang) for row in rows]
+
+    def represent_row(self, row, lang) -> dict:
+        raise NotImplementedError
+
+    def data(self, queryset) -> list[dict]:
+        return self.represent(self.fetch(queryset))
+
+    def variants(self, variants):
+        return None if variants is None else represent_variants(variants, self.url)
+
+
+class CompactImageSerializer(CompactSerializer):
+    """``ImageSerializer``."""
+
+    model = Image
+    columns = ("product_id", "image", "image_variants")
+    storage = Image._meta.get_field("image").storage
+
+    def represent_row(self, row, lang):
+        return {
+            "image": self.url(row["image"], self.storage),
+            "image_variants": self.variants(row["image_variants"]),
+        }
+
+
+class CompactProductSerializer(CompactSerializer):
+    """``ProductSerializer``."""
+
+    model = Product
+    columns = ("id", "price", "category_id", "image", "image_variants")
+    localized = ("name", "description")
+    storage = Product._meta.get_field("image").storage
+
+    def __init__(self, context=None):
+        super().__init__(context)
+        self.images = CompactImageSerializer(self.context)
+
+    def fetch_related(self, rows, using, languages):
+        self.nest(rows, "images", self.images, Image.objects.using(using), "product_id", languages)
+
+    def represent_row(self, row, lang):
+        price = row["price"]
+        return {
+            "id": row["id"],
+            "name": row[annotation_name("name", lang)],
+            "price": None if price is None else float(price),
+            "images": self.images.represent(row["images"], lang),
+            "description": row[annotation_name("description", lang)],
+            "category": row["category_id"],
+            "image": self.url(row["image"], self.storage),
+            "image_variants": self.variants(row["image_variants"]),
+        }
+
+
+class CompactCategorySerializer(CompactSerializer):
+    """``CategorySerializer``."""
+
+    model = Category
+    columns = ("id",)
+    localized = ("name",)
+
+    def __init__(self, context=None):
+        super().__init__(context)
+        self.products = CompactProductSerializer(self.context)
+
+    def fetch_related(self, rows, using, languages):
+        self.nest(rows, "products", self.products, Product.objects.using(using), "category_id", languages)
+
+    def represent_row(self, row, lang):
+        return {
+            "id": row["id"],
+            "name": row[annotation_name("name", lang)],
+            "products": self.products.represent(row["products"], lang),
+        }
+
+
+class CompactBannerSerializer(CompactSerializer):
+    """``BannerSerializer``."""
+
+    model = Banner
+    columns = ("id", "image", "image_variants")
+    localized = ("title", "sub_title")
+    storage = Banner._meta.get_field("image").storage
+
+    def represent_row(self, row, lang):
+        return {
+            "id": row["id"],
+            "title": row[annotation_name("title", lang)],
+            "image": self.url(row["image"], self.storage),
+            "image_variants": self.variants(row["image_variants"]),
+            "sub_title": row[annotation_name("sub_title", lang)],
+        }
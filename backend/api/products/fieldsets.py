@@ -0,0 +1,74 @@
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def parse(value: str) -> tuple:
+    """
+    ``"id,name,images.image"`` as a hashable tree of ``(name, subtree)``
+    pairs, sorted by name: ``(("id", ()), ("images", (("image", ()),)), ("name", ()))``.
+    An empty subtree selects the whole field.
+    """
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split("."))):
+            node = node.setdefault(name, {})
+    return freeze(tree)
+
+
+def freeze(tree: dict) -> tuple:
+    return tuple(sorted((name, freeze(subtree)) for name, subtree in tree.items()))
+
+
+def from_request(request) -> tuple[tuple, tuple]:
+    """The ``fields`` and ``expand`` trees of the query string, empty when not given."""
+    if request is None:
+        return (), ()
+    params = request.query_params
+    return parse(params.get(FIELDS_PARAM, "")), parse(params.get(EXPAND_PARAM, ""))
+
+
+class SparseFieldsMixin:
+    """
+    Serializer taking ``fields`` and ``expand`` trees (see ``parse``):
+    ``fields`` keeps only the named fields, ``expand`` swaps the fields in
+    ``expandable_fields`` for the nested serializer given there. Nested
+    serializers get the subtrees under their name. Unknown names are a 400.
+    """
+
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=(), expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields or expand:
+            self.select(fields, expand)
+
+    def select(self, fields, expand, path=""):
+        fields, expand = dict(fields), dict(expand)
+        unknown = [
+            *(f"{FIELDS_PARAM}={path}{name}" for name in fields if name not in self.fields),
+            *(
+                f"{EXPAND_PARAM}={path}{name}" for name, subtree in expand.items()
+                if name not in self.expandable_fields and not (name in self.fields and subtree)
+            ),
+        ]
+        if unknown:
+            raise ValidationError({"detail": [f"Unknown field: {name}" for name in unknown]})
+
+        for name in expand:
+            if name in self.expandable_fields:
+                self.fields[name] = self.expandable_fields[name](read_only=True)
+        if fields:
+            for name in [name for name in self.fields if name not in fields]:
+                del self.fields[name]
+
+        for name, field in self.fields.items():
+            if not (fields.get(name) or expand.get(name)):
+                continue
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if not isinstance(nested, SparseFieldsMixin):
+                raise ValidationError({"detail": [f"Field {path}{name} has no subfields"]})
+            nested.select(fields.get(name, ()), expand.get(name, ()), f"{path}{name}.")
@@ -0,0 +1,40 @@
+from django.db.models import Case, IntegerField, Value, When
+from rest_framework.filters import SearchFilter
+
+from apps.products.search import get_search_index
+
+from .pagination import SEARCH_RANK
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    ``?search=`` backed by the product full-text index (FTS5 on SQLite,
+    ``tsvector`` on Postgres) instead of ``LIKE '%q%'`` scans. Results are
+    ordered by relevance and every word matches as a prefix.
+
+    Unpaginated searches return the ``max_results`` best matches. Paginated
+    ones (``?page_size=``/``?cursor=``) page through every match: the
+    paginator's ``search_window`` says which slice of the ranking to fetch,
+    and the ``SEARCH_RANK`` alias keeps it in rank order.
+    """
+
+    max_results = 100
+
+    def filter_queryset(self, request, queryset, view):
+        text = " ".join(self.get_search_terms(request))
+        if not text:
+            return queryset
+
+        offset, limit = 0, self.max_results
+        paginator = getattr(view, "paginator", None)
+        if hasattr(paginator, "search_window") and paginator.is_requested(request):
+            offset, limit = paginator.search_window(request)
+        # Other filters (?category=) are applied in the index query, so the
+        # slice holds only products this queryset selects.
+        within = queryset if queryset.query.has_filters() else None
+        ids = get_search_index(queryset.db).search(text, limit, offset, within)
+        ranking = Case(
+            *(When(pk=pk, then=offset + position) for position, pk in enumerate(ids)),
+            output_field=IntegerField(),
+        ) if ids else Value(offset)
+        return queryset.filter(pk__in=ids).alias(**{SEARCH_RANK: ranking}).order_by(SEARCH_RANK)
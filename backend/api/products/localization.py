@@ -0,0 +1,75 @@
+from functools import lru_cache
+
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, NullIf
+from modeltranslation.fields import NONE
+from modeltranslation.manager import get_translatable_fields_for_model
+from modeltranslation.thread_context import fallbacks_enabled
+from modeltranslation.utils import build_localized_fieldname, get_language, resolution_order
+from rest_framework import serializers
+
+
+def translated_fields(model) -> tuple[str, ...]:
+    return tuple(get_translatable_fields_for_model(model) or ())
+
+
+def annotation_name(name: str, lang: str) -> str:
+    return f"{name}_{lang}_localized"
+
+
+def localized(model, name: str, lang: str):
+    """
+    The value modeltranslation's descriptor would return for ``name`` in
+    ``lang``, as an SQL expression: the first language in fallback order
+    with a non-empty column, else the fallback value or field default.
+    """
+    field, default, columns = _columns(model, name, lang)
+    descriptor = getattr(model, name)
+    fallback = descriptor.fallback_value if fallbacks_enabled() else NONE
+    return Coalesce(*columns, Value(default if fallback is NONE else fallback), output_field=field)
+
+
+@lru_cache(maxsize=None)
+def _columns(model, name, lang):
+    # Built once per model, field and language. The fallback value, which
+    # need not be hashable, is added by ``localized``.
+    order = resolution_order(lang, getattr(model, name).fallback_languages)
+    field = model._meta.get_field(name)
+    default = field.get_default()
+    columns = [F(build_localized_fieldname(name, language)) for language in order]
+    if default is not None:
+        columns = [NullIf(column, Value(default)) for column in columns]
+    return field, default, tuple(columns)
+
+
+def annotations(model, names, languages=None) -> dict:
+    """``localized`` expressions for ``names`` in ``languages`` (the active one by default)."""
+    return {
+        annotation_name(name, lang): localized(model, name, lang)
+        for lang in languages or (get_language(),)
+        for name in names
+    }
+
+
+class LocalizedCharField(serializers.CharField):
+    """
+    A translated model field: reads the value the queryset resolved in SQL
+    for the active language (see ``annotations``), or the model attribute
+    when it wasn't annotated.
+    """
+
+    def get_attribute(self, instance):
+        try:
+            return instance.__dict__[annotation_name(self.source, get_language())]
+        except KeyError:
+            return super().get_attribute(instance)
+
+
+class LocalizedFieldsMixin:
+    """Renders the translated fields of ``Meta.model`` with ``LocalizedCharField``."""
+
+    def build_standard_field(self, field_name, model_field):
+        field_class, field_kwargs = super().build_standard_field(field_name, model_field)
+        if field_class is serializers.CharField and field_name in translated_fields(self.Meta.model):
+            field_class = LocalizedCharField
+        return field_class, field_kwargs
@@ -0,0 +1,302 @@
+import hashlib
+from itertools import islice
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connection
+from django.db.models import Count, DateTimeField, IntegerField, Max
+from django.db.models.expressions import RawSQL
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import translation
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.translation import get_language
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from apps.utils.generations import get_generations
+
+from . import catalog, fieldsets
+from .planner import plan_for
+
+
+class QueryPlanMixin:
+    """
+    Loads exactly what ``serializer_class`` renders: related objects are
+    joined or prefetched in bulk and unused columns are left out.
+
+    ``?fields=id,name,images.image`` and ``?expand=category`` narrow or widen
+    what is rendered, and the queryset follows: columns and prefetches of
+    fields that are left out are never loaded.
+    """
+
+    def get_field_selection(self):
+        return fieldsets.from_request(self.request)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        required = getattr(self.paginator, "ordering_fields", ())
+        return plan_for(self.get_serializer_class(), required, *self.get_field_selection()).apply(queryset)
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_field_selection()
+        if fields or expand:
+            kwargs.setdefault("fields", fields)
+            kwargs.setdefault("expand", expand)
+        return super().get_serializer(*args, **kwargs)
+
+
+class CompactSerializerMixin:
+    """
+    Renders plain ``list`` requests, neither paginated nor narrowed with
+    ``?fields=``/``?expand=``, with ``compact_serializer_class``: straight
+    from ``values()`` rows, without model instances or serializer fields.
+    """
+
+    compact_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if (
+            self.compact_serializer_class is None
+            or (self.paginator is not None and self.paginator.is_requested(request))
+            or any(self.get_field_selection())
+        ):
+            return super().list(request, *args, **kwargs)
+        compact = self.compact_serializer_class(context=self.get_serializer_context())
+        return Response(compact.data(self.filter_queryset(self.get_queryset())))
+
+
+class StreamingListMixin:
+    """
+    ``?stream=1`` sends ``list`` as a streamed JSON array. Rows are read with
+    ``iterator(chunk_size=stream_chunk_size)``, so each chunk's related
+    objects are prefetched and serialized as it's read: memory stays flat
+    whatever the size of the catalog and the first bytes leave before the
+    last row is read. Paginated and non-JSON requests are not streamed.
+    """
+
+    stream_query_param = "stream"
+    stream_chunk_size = 500
+
+    def is_stream_requested(self, request):
+        return (
+            request.query_params.get(self.stream_query_param) in ("1", "true")
+            and request.accepted_renderer.format == "json"
+            and not (self.paginator is not None and self.paginator.is_requested(request))
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_stream_requested(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        # Iterated after the view returns: keep the language the queryset was planned for.
+        return StreamingHttpResponse(
+            self.stream(queryset, request.accepted_renderer, get_language()),
+            content_type=request.accepted_renderer.media_type,
+        )
+
+    def stream(self, queryset, renderer, language):
+        with translation.override(language):
+            rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+            yield b"["
+            separator = b""
+            while chunk := list(islice(rows, self.stream_chunk_size)):
+                yield separator + renderer.render(self.get_serializer(chunk, many=True).data)[1:-1]
+                separator = b","
+            yield b"]"
+
+
+class CatalogReadModelMixin:
+    """
+    Serves plain ``list`` and ``retrieve`` requests from the ``CatalogEntry``
+    read model: one indexed scan of pre-rendered JSON, no joins and no
+    serializers. Anything else (search, pagination, other filters, the
+    browsable API) goes through the regular view.
+    """
+
+    catalog_kind = None
+    catalog_filters = ()
+
+    def catalog_filter_kwargs(self, request):
+        """``CatalogEntry`` filters for the query string, ``None`` if the read model can't answer it."""
+        if request.accepted_renderer.format != "json":
+            return None
+        filters = {}
+        for name, value in request.query_params.items():
+            if name not in self.catalog_filters or not value.isdigit():
+                return None
+            filters[f"{name}_id"] = int(value)
+        return filters
+
+    def list(self, request, *args, **kwargs):
+        filters = self.catalog_filter_kwargs(request)
+        texts = catalog.entries(self.catalog_kind, get_language(), **filters) if filters is not None else None
+        if texts is None:
+            return super().list(request, *args, **kwargs)
+        return self.catalog_response(request, f"[{','.join(texts)}]")
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        filters = self.catalog_filter_kwargs(request)
+        texts = None
+        if filters == {} and str(lookup).isdigit():
+            texts = catalog.entries(self.catalog_kind, get_language(), object_id=int(lookup))
+        if not texts:
+            return super().retrieve(request, *args, **kwargs)
+        return self.catalog_response(request, texts[0])
+
+    def catalog_response(self, request, text):
+        return HttpResponse(catalog.absolutize(text, request), content_type=request.accepted_renderer.media_type)
+
+
+class CachedResponseMixin:
+    """
+    Caches the rendered JSON of ``list`` and ``retrieve`` in the
+    ``cache_alias`` cache per URL (host included) and active language.
+
+    Only query strings made of parameters the view reads are cached, keyed
+    on those parameters in sorted order: made-up parameters can't fill the
+    cache with copies of the same response.
+
+    Keys embed the generation counters of ``cache_models``, which the catalog
+    signals bump on every save and delete, so a change makes exactly the
+    affected endpoints miss instead of waiting for a timeout.
+    """
+
+    cache_models = ()
+    cache_timeout = 60 * 60 * 24
+    cache_alias = "responses"
+
+    @property
+    def response_cache(self):
+        return caches[self.cache_alias]
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_query_params(self) -> set[str]:
+        """Query parameters that change the response: format, fieldsets, pagination and filters."""
+        params = {api_settings.URL_FORMAT_OVERRIDE, fieldsets.FIELDS_PARAM, fieldsets.EXPAND_PARAM}
+        if self.paginator is not None:
+            params.update(getattr(self.paginator, name, None) for name in ("cursor_query_param", "page_size_query_param"))
+        params.update(getattr(backend, "search_param", None) for backend in self.filter_backends)
+        params.update(getattr(self, "filterset_fields", ()))
+        return params - {None}
+
+    def get_response_cache_key(self, request):
+        """The key of this request's response, ``None`` if it has parameters the view does not read."""
+        params = sorted(request.query_params.lists())
+        if not {name for name, _ in params} <= self.get_cache_query_params():
+            return None
+        url = f"{request.build_absolute_uri(request.path)}?{urlencode(params, doseq=True)}"
+        url = hashlib.sha1(url.encode()).hexdigest()
+        generations = "-".join(str(generation) for generation in get_generations(self.cache_models))
+        return f"api:{self.basename}:{get_language()}:{generations}:{url}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        key = self.get_response_cache_key(request) if renderer.format == "json" else None
+        if key is None:
+            return handler(request, *args, **kwargs)
+
+        cache = self.response_cache
+        cached = cache.get(key)
+        if cached is not None:
+            content_type, content = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200 or response.streaming:
+            return response
+        if hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(
+                lambda rendered: cache.set(key, (rendered["Content-Type"], rendered.content), self.cache_timeout)
+            )
+        else:
+            # Already rendered, e.g. served from the catalog read model.
+            cache.set(key, (response["Content-Type"], response.content), self.cache_timeout)
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag/Last-Modified for ``list`` and ``retrieve``.
+
+    The validators are the latest ``date_updated`` and the row count of the
+    filtered queryset plus the same two numbers for every other table in
+    ``cache_models``, all fetched with one aggregate query. A matching
+    ``If-None-Match``/``If-Modified-Since`` gets a 304 before anything is
+    serialized. With ``CachedResponseMixin`` the validators are cached next
+    to the response, under the same generation counters.
+    """
+
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        def filtered():
+            # Kept for the handler, so filters and a ?search= index query run once.
+            self.filtered_queryset = self.filter_queryset(self.get_queryset())
+            return self.filtered_queryset
+
+        return self.conditional_response(filtered, super().list, request, *args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        filtered = self.__dict__.pop("filtered_queryset", None)
+        return filtered if filtered is not None else super().filter_queryset(queryset)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.get_queryset().filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, DjangoValidationError):
+            # Not a valid key (e.g. /products/abc/): the 404 comes from get_object.
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(lambda: queryset, super().retrieve, request, *args, **kwargs)
+
+    def compute_validators(self, queryset):
+        aggregates = {"updated": Max("date_updated"), "count": Count("pk")}
+        for model in self.cache_models:
+            if model is queryset.model:
+                continue
+            table = connection.ops.quote_name(model._meta.db_table)
+            column = connection.ops.quote_name(model._meta.get_field("date_updated").column)
+            # Whole related tables, wrapped in Max() so they fit in the same aggregate.
+            aggregates[f"{model._meta.model_name}_updated"] = Max(
+                RawSQL(f"SELECT MAX({column}) FROM {table}", (), output_field=DateTimeField())
+            )
+            aggregates[f"{model._meta.model_name}_count"] = Max(
+                RawSQL(f"SELECT COUNT(*) FROM {table}", (), output_field=IntegerField())
+            )
+        stats = queryset.order_by().aggregate(**aggregates)
+
+        fingerprint = f"{get_language()}:{self.request.accepted_renderer.format}:{sorted(stats.items())}"
+        etag = f'"{hashlib.sha1(fingerprint.encode()).hexdigest()}"'
+        updated = [value for key, value in stats.items() if key.endswith("updated") and value is not None]
+        # HTTP dates have whole seconds.
+        return etag, int(max(updated).timestamp()) if updated else None
+
+    def get_validators(self, request, get_queryset):
+        key = self.get_response_cache_key(request) if isinstance(self, CachedResponseMixin) else None
+        if key is None:
+            return self.compute_validators(get_queryset())
+        key = f"{key}:{request.accepted_renderer.format}:validators"
+        validators = self.response_cache.get(key)
+        if validators is None:
+            validators = self.compute_validators(get_queryset())
+            self.response_cache.set(key, validators, self.cache_timeout)
+        return validators
+
+    def conditional_response(self, get_queryset, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, get_queryset)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
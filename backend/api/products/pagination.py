@@ -0,0 +1,162 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+KEYSET_ORDERING = ("-date_created", "id")
+# Alias FullTextSearchFilter ranks search results with, their position in the ranking.
+SEARCH_RANK = "search_rank"
+SEARCH_CURSOR = "search"
+
+
+def encode_cursor(instance) -> str:
+    value = f"{instance.date_created.isoformat()}|{instance.pk}"
+    return urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        date_created, pk = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        date_created = parse_datetime(date_created)
+        pk = int(pk)
+    except (TypeError, ValueError):
+        raise NotFound("Invalid cursor")
+    if date_created is None:
+        raise NotFound("Invalid cursor")
+    return date_created, pk
+
+
+def encode_search_cursor(position: int) -> str:
+    return urlsafe_b64encode(f"{SEARCH_CURSOR}|{position}".encode()).decode()
+
+
+def decode_search_cursor(cursor: str) -> int:
+    try:
+        kind, position = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        position = int(position)
+    except (TypeError, ValueError):
+        raise NotFound("Invalid cursor")
+    if kind != SEARCH_CURSOR or position < 0:
+        raise NotFound("Invalid cursor")
+    return position
+
+
+def after_cursor(cursor: str) -> Q:
+    """Rows that come after ``cursor`` in ``KEYSET_ORDERING``."""
+    date_created, pk = decode_cursor(cursor)
+    return Q(date_created__lt=date_created) | Q(date_created=date_created, id__gt=pk)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on ``(-date_created, id)``.
+
+    Each page seeks past the last row of the previous one instead of using an
+    OFFSET, so every page costs the same index range scan. Pagination is only
+    applied when the client sends ``cursor`` or ``page_size``; without them the
+    endpoint keeps returning a plain list.
+
+    Search results stay in rank order: their cursor is the position of the
+    next match, and ``search_window`` tells FullTextSearchFilter which
+    slice of the ranking a page needs.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_fields = tuple(name.lstrip("-") for name in KEYSET_ORDERING)
+
+    def is_requested(self, request) -> bool:
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def search_window(self, request) -> tuple[int, int]:
+        """Offset and number of search matches for the requested page, one more to tell if another follows."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        return (decode_search_cursor(cursor) if cursor else 0), self.get_page_size(request) + 1
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        if SEARCH_RANK in queryset.query.annotations:
+            # Already the slice of the ranking this page needs.
+            offset, _ = self.search_window(request)
+            rows = list(queryset)
+            page = rows[: self.page_size]
+            self.next_cursor = encode_search_cursor(offset + len(page)) if len(rows) > len(page) else None
+            return page
+
+        queryset = queryset.order_by(*KEYSET_ORDERING)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(after_cursor(cursor))
+
+        rows = list(queryset[: self.page_size + 1])
+        page = rows[: self.page_size]
+        self.next_cursor = encode_cursor(page[-1]) if len(rows) > len(page) else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+def products_page_url(request, category_id, cursor, page_size) -> str:
+    """Link to the next page of a category's products on the products endpoint."""
+    url = reverse("products-list")
+    if request is not None:
+        url = request.build_absolute_uri(url)
+    url = replace_query_param(url, "category", category_id)
+    url = replace_query_param(url, KeysetPagination.page_size_query_param, page_size)
+    return replace_query_param(url, KeysetPagination.cursor_query_param, cursor)
@@ -0,0 +1,145 @@
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Prefetch, QuerySet, Window
+from django.db.models.functions import RowNumber
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField
+
+from .localization import LocalizedCharField, annotations
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """
+    The ``select_related``/``prefetch_related``/``only`` calls needed to
+    serialize a queryset with a given serializer without N+1 queries.
+
+    ``only`` is ``None`` when the serializer reads something that is not a
+    model field (a method field, ``source="*"``), so every column is loaded.
+
+    A prefetched plan with ``limit`` keeps only the first ``limit`` rows per
+    ``partition`` value in ``ordering``, within the same query.
+
+    ``localized`` translated fields are not loaded column by column: each is
+    one annotation per language, resolved with its fallbacks in SQL.
+    """
+
+    model: type
+    only: tuple[str, ...] | None
+    select_related: tuple[str, ...]
+    prefetch: tuple[tuple[str, "QueryPlan | None"], ...]
+    limit: int | None = None
+    partition: str | None = None
+    ordering: tuple[str, ...] = ()
+    localized: tuple[str, ...] = ()
+
+    def apply(self, queryset: QuerySet, languages=None) -> QuerySet:
+        """``languages`` the localized fields are resolved for, the active one by default."""
+        if self.limit is not None:
+            queryset = queryset.alias(
+                _row=Window(RowNumber(), partition_by=F(self.partition), order_by=self.ordering)
+            ).filter(_row__lte=self.limit)
+        if self.ordering:
+            queryset = queryset.order_by(*self.ordering)
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.only is not None:
+            queryset = queryset.only(*self.only)
+        if self.localized:
+            queryset = queryset.annotate(**annotations(self.model, self.localized, languages))
+        for lookup, plan in self.prefetch:
+            if plan is None:
+                queryset = queryset.prefetch_related(lookup)
+            else:
+                related = plan.apply(plan.model._default_manager.all(), languages)
+                queryset = queryset.prefetch_related(Prefetch(lookup, queryset=related))
+        return queryset
+
+
+def _nested_serializer(field):
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, serializers.ModelSerializer):
+        return field
+    return None
+
+
+def _build(serializer, required=()) -> QueryPlan:
+    model = serializer.Meta.model
+    opts = model._meta
+    only = {opts.pk.name, *required}
+    localized = set()
+    complete = True
+    select_related = []
+    prefetch = []
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            complete = False
+            continue
+        attr = field.source_attrs[0]
+        try:
+            model_field = opts.get_field(attr)
+        except FieldDoesNotExist:
+            complete = False
+            continue
+
+        nested = _nested_serializer(field)
+        forward = model_field.concrete and (model_field.many_to_one or model_field.one_to_one)
+
+        if nested is not None and forward:
+            # Followed with a JOIN, the nested plan is flattened into this one.
+            child = _build(nested)
+            select_related.append(attr)
+            select_related.extend(f"{attr}__{name}" for name in child.select_related)
+            prefetch.extend((f"{attr}__{lookup}", plan) for lookup, plan in child.prefetch)
+            if child.only is None:
+                only.add(attr)
+            else:
+                # Annotations can't reach joined instances: their columns are loaded.
+                only.update(f"{attr}__{name}" for name in child.only + child.localized)
+        elif nested is not None:
+            # Reverse FK or M2M: one extra query, the related rows must keep the
+            # column that joins them back to this model.
+            back = (model_field.field.name,) if model_field.one_to_many else ()
+            limit = getattr(field, "prefetch_limit", None)
+            if limit is not None and back:
+                ordering = tuple(field.ordering)
+                plan = _build(nested, back + tuple(name.lstrip("-") for name in ordering))
+                plan = replace(plan, limit=limit, partition=back[0], ordering=ordering)
+            else:
+                plan = _build(nested, back)
+            prefetch.append((attr, plan))
+        elif isinstance(field, ManyRelatedField) or not model_field.concrete:
+            prefetch.append((attr, None))
+        elif isinstance(field, LocalizedCharField) and len(field.source_attrs) == 1:
+            localized.add(attr)
+        else:
+            only.add(attr)
+
+    if not complete:
+        # Every column is loaded anyway, the descriptors resolve the fallbacks.
+        localized = set()
+    return QueryPlan(
+        model=model,
+        only=tuple(sorted(only)) if complete else None,
+        select_related=tuple(select_related),
+        prefetch=tuple(prefetch),
+        localized=tuple(sorted(localized)),
+    )
+
+
+@lru_cache(maxsize=256)
+def plan_for(serializer_class, required=(), fields=(), expand=()) -> QueryPlan:
+    """
+    Plan for ``serializer_class``; ``required`` names extra columns the caller
+    reads itself, e.g. the pagination key. ``fields`` and ``expand`` are the
+    sparse fieldset trees the serializer is given, see ``fieldsets.parse``.
+    """
+    if fields or expand:
+        return _build(serializer_class(fields=fields, expand=expand), required)
+    return _build(serializer_class(), required)
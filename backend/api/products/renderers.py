@@ -0,0 +1,71 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib implementation is used without it.
+    orjson = None
+
+if orjson is not None:
+    # Dates, times and dataclasses go through DRF's encoder, so the output
+    # matches JSONRenderer; non-string keys are stringified like json does.
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` on orjson, byte for byte the same output for compact,
+    unescaped JSON (the settings default). Types orjson doesn't know (Decimal,
+    dates, lazy translations, querysets) go through DRF's encoder.
+
+    Indented output (the browsable API), non-default JSON settings and
+    values orjson rejects, such as integers past 64 bits, are rendered by
+    the stdlib ``JSONRenderer``. Unlike it, orjson writes NaN and infinity
+    as ``null`` instead of raising.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped like JSONRenderer does, for a strict JavaScript subset.
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` on orjson, when it's installed."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            content = stream.read()
+            if encoding.lower().replace("-", "") != "utf8":
+                content = content.decode(encoding)
+            # orjson rejects NaN and infinity, as the strict stdlib parser does.
+            return orjson.loads(content)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+def dumps(data) -> str:
+    """``data`` as ``FastJSONRenderer`` renders it."""
+    return FastJSONRenderer().render(data).decode()
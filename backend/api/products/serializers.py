@@ -1,39 +1,109 @@
 from rest_framework import serializers
 from apps.products.models import Product,Category,Banner,Image
-from django.conf import settings
-from django.core.mail import send_mail
 from datetime import datetime
-from django.template.loader import render_to_string
 from django.core.cache import cache
+from django.core.files.storage import default_storage
 from random import randint
-
-class ImageSerializer(serializers.ModelSerializer):
+from apps.contact.emails import verification_email
+from apps.utils import outbox
+from .fieldsets import SparseFieldsMixin
+from .localization import LocalizedFieldsMixin
+from .pagination import KEYSET_ORDERING, encode_cursor, products_page_url
+
+def represent_variants(variants, url):
+    """``srcset`` strings per format (best format first) plus every variant's size and URLs."""
+    srcset = {}
+    sizes = {}
+    for label, variant in sorted(variants.items(), key=lambda item: item[1]['width']):
+        sizes[label] = {'width': variant['width'], 'height': variant['height']}
+        for ext, name in variant['files'].items():
+            variant_url = url(name)
+            sizes[label][ext] = variant_url
+            srcset.setdefault(ext, []).append(f"{variant_url} {variant['width']}w")
+    return {
+        'srcset': {ext: ', '.join(candidates) for ext, candidates in srcset.items()},
+        'sizes': sizes,
+    }
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Renders a ``CompressedImageField`` variants column, see ``represent_variants``."""
+
+    def url(self, name):
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def to_representation(self, variants):
+        return represent_variants(variants, self.url)
+
+
+class ImageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
     class Meta:
         model = Image
-        fields = ["image"]
+        fields = ["image", "image_variants"]
+
+class SimpleCategorySerializer(SparseFieldsMixin, LocalizedFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name']
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, LocalizedFieldsMixin, serializers.ModelSerializer):
     images = ImageSerializer(many=True)
+    image_variants = ImageVariantsField()
+    expandable_fields = {'category': SimpleCategorySerializer}
     class Meta:
         model = Product
-        fields = ['id', 'name', 'price','images',"description","type", 'category', 'images',"image"]
+        fields = ['id', 'name', 'price','images',"description", 'category',"image", "image_variants"]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, LocalizedFieldsMixin, serializers.ModelSerializer):
     products = ProductSerializer(many=True)
     class Meta:
         model = Category
         fields =['id', 'name', 'products']
 
-class SimpleCategorySerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Category
-        fields = ['id', 'name']
-
-class BannerSerializer(serializers.ModelSerializer):
+class ProductPageSerializer(serializers.ListSerializer):
+    """
+    First ``page_size`` products of a category plus a cursor link to the
+    rest on the products endpoint. The query planner prefetches one extra
+    row per category so the link is only given when there is a next page.
+    """
+    page_size = 8
+    prefetch_limit = page_size + 1
+    ordering = KEYSET_ORDERING
+
+    def to_representation(self, data):
+        products = list(data.all())
+        page = products[:self.page_size]
+        next_url = None
+        if len(products) > len(page):
+            next_url = products_page_url(
+                self.context.get('request'),
+                data.instance.pk,
+                encode_cursor(page[-1]),
+                self.page_size,
+            )
+        return {'next': next_url, 'results': super().to_representation(page)}
+
+
+class PaginatedCategorySerializer(CategorySerializer):
+    products = ProductPageSerializer(child=ProductSerializer())
+
+class BannerSerializer(SparseFieldsMixin, LocalizedFieldsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
     class Meta:
         model = Banner
-        fields = ['id','title','image','sub_title']
+        fields = ['id','title','image','image_variants','sub_title']
+
+class SuggestionItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+
+class SuggestionSerializer(serializers.Serializer):
+    products = SuggestionItemSerializer(many=True)
+    categories = SuggestionItemSerializer(many=True)
 
 
 
@@ -89,20 +159,18 @@ class ContactSerializer(serializers.Serializer):
         )
         code = verification_code
         current_time = datetime.now().year
-        html_content = render_to_string(
-            "emails/user_verification.html",
+        html_content = verification_email.render(
             {
                 "code": code,
                 "current_year": current_time,
             }
         )
-        send_mail(
+        # Delivered by the send_emails worker, the request only queues it.
+        outbox.enqueue(
             'Email Verification Code',
             f'Your verification code is: {verification_code}',
-            settings.DEFAULT_FROM_EMAIL,
             (gmail,),
             html_message=html_content,
-            fail_silently=False,
         )
 
 class ContactVerificationSerializer(serializers.Serializer):
@@ -0,0 +1,161 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone, translation
+
+from apps.products.models import Banner, CatalogEntry, Category, Image, Product
+from apps.utils.generations import get_generations
+
+from . import catalog
+from .compact import CompactBannerSerializer
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip files are written without it.
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+CURRENT = "current"
+
+
+def snapshot_root() -> Path:
+    return Path(getattr(settings, "CATALOG_SNAPSHOT_ROOT", Path(settings.BASE_DIR) / "catalog_snapshot"))
+
+
+def render(lang, base_url) -> dict[str, bytes]:
+    """The unpaginated ``categories/``, ``products/`` and ``banners/`` responses in ``lang``."""
+    with translation.override(lang):
+        banners = CompactBannerSerializer(context={"request": catalog.MarkerRequest()}).data(Banner.objects.all())
+    texts = {
+        "categories": f"[{','.join(catalog.entries(CatalogEntry.Kind.CATEGORY, lang))}]",
+        "products": f"[{','.join(catalog.entries(CatalogEntry.Kind.PRODUCT, lang))}]",
+        "banners": catalog.dumps(banners),
+    }
+    return {name: text.replace(catalog.ESCAPED_HOST_MARKER, base_url).encode() for name, text in texts.items()}
+
+
+def encodings(content: bytes) -> dict[str, bytes]:
+    """Files to write per endpoint: the JSON and its precompressed copies, by suffix."""
+    files = {"": content, ".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        files[".br"] = brotli.compress(content, quality=11)
+    return files
+
+
+def build(root=None, base_url=None, keep=3) -> dict:
+    """
+    Render every language, write the files into a new version directory and
+    publish it: the directory is renamed into place, then ``current`` and
+    ``manifest.json`` are swapped atomically, so readers only ever see
+    complete snapshots. The version is a hash of the content, an unchanged
+    catalog publishes nothing. The ``keep`` newest versions are kept.
+    """
+    root = Path(root or snapshot_root())
+    base_url = getattr(settings, "CATALOG_SNAPSHOT_BASE_URL", "") if base_url is None else base_url
+    rendered = {lang: render(lang, base_url) for lang, _ in settings.LANGUAGES}
+
+    digest = hashlib.sha1()
+    for lang, files in sorted(rendered.items()):
+        for name, content in sorted(files.items()):
+            digest.update(f"{lang}/{name}:{len(content)}:".encode())
+            digest.update(content)
+    version = digest.hexdigest()[:12]
+
+    manifest = read_manifest(root)
+    if manifest is not None and manifest["version"] == version and (root / version).is_dir():
+        return manifest
+
+    root.mkdir(parents=True, exist_ok=True)
+    staging = root / f".{version}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    manifest = {"version": version, "created": timezone.now().isoformat(), "files": {}}
+    for lang, files in rendered.items():
+        (staging / lang).mkdir(parents=True)
+        for name, content in files.items():
+            for suffix, data in encodings(content).items():
+                (staging / lang / f"{name}.json{suffix}").write_bytes(data)
+            manifest["files"].setdefault(lang, {})[name] = {
+                "path": f"{version}/{lang}/{name}.json",
+                "size": len(content),
+                "encodings": ["gzip", "br"] if brotli is not None else ["gzip"],
+            }
+
+    try:
+        staging.rename(root / version)
+    except OSError:
+        # Published meanwhile by another build of the same content.
+        shutil.rmtree(staging, ignore_errors=True)
+    replace_atomically(root / CURRENT, lambda path: path.symlink_to(version, target_is_directory=True))
+    replace_atomically(root / MANIFEST, lambda path: path.write_text(json.dumps(manifest, indent=2)))
+    prune(root, keep, version)
+    return manifest
+
+
+def replace_atomically(target: Path, create) -> None:
+    temporary = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    if temporary.is_symlink() or temporary.exists():
+        temporary.unlink()
+    create(temporary)
+    os.replace(temporary, target)
+
+
+def read_manifest(root: Path) -> dict | None:
+    try:
+        return json.loads((root / MANIFEST).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def prune(root: Path, keep: int, current: str) -> None:
+    versions = sorted(
+        (path for path in root.iterdir() if path.is_dir() and not path.is_symlink() and not path.name.startswith(".")),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for path in versions[keep:]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def generations() -> tuple[int, ...]:
+    """
+    Generations of the catalog models, bumped by every committed catalog
+    write and import: a snapshot built under others is out of date.
+    """
+    return get_generations((Category, Product, Image, Banner))
+
+
+class Debounce:
+    """
+    When a watcher rebuilds: once the generations have stood still for
+    ``quiet`` seconds, and at the latest ``max_delay`` seconds after the
+    first change the published snapshot misses.
+    """
+
+    def __init__(self, quiet: float, max_delay: float):
+        self.quiet = quiet
+        self.max_delay = max_delay
+        self.published = None
+        self.seen = None
+        self.changed_at = None
+        self.stale_since = None
+
+    def due(self, current: tuple, now: float) -> bool:
+        if current == self.published:
+            return False
+        if current != self.seen:
+            self.seen, self.changed_at = current, now
+        if self.stale_since is None:
+            self.stale_since = now
+        return now - self.changed_at >= self.quiet or now - self.stale_since >= self.max_delay
+
+    def built(self, current: tuple) -> None:
+        self.published, self.stale_since = current, None
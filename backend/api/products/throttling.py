@@ -0,0 +1,127 @@
+import hashlib
+import re
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from apps.utils.cache import transform
+
+RATE_RE = re.compile(r"^(\d+)/(\d*)([smhd])")
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """``"5/10m"`` -> ``(5, 600)``; the unit may be spelled out, as in DRF: ``"20/hour"``."""
+    match = RATE_RE.match(rate)
+    if match is None:
+        raise ImproperlyConfigured(f"Invalid throttle rate {rate!r}")
+    num, multiplier, unit = match.groups()
+    return int(num), int(multiplier or 1) * PERIODS[unit]
+
+
+class CacheThrottle(BaseThrottle):
+    """
+    Base for throttles keeping their state in a single cache entry, updated
+    with ``apps.utils.cache.transform``: one atomic round trip per check.
+
+    The limit is ``DEFAULT_THROTTLE_RATES[scope]`` from ``REST_FRAMEWORK``;
+    subclasses say what is counted (``get_ident_value``) and how (``step``).
+    """
+
+    scope = None
+
+    def get_ident_value(self, request, view):
+        """What the limit applies to, or ``None`` to let the request through."""
+        return self.get_ident(request)
+
+    def step(self, state, now):
+        """Return the new state and the seconds to wait, ``None`` if allowed."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        value = self.get_ident_value(request, view)
+        if rate is None or value is None:
+            return True
+        self.num, self.duration = parse_rate(rate)
+
+        digest = hashlib.sha1(str(value).encode()).hexdigest()
+        now = time.time()
+        state = transform(
+            cache, f"throttle:{self.scope}:{digest}", lambda state: self.step(state, now), self.duration * 2,
+        )
+        self.wait_seconds = state[-1]
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class TokenBucketThrottle(CacheThrottle):
+    """
+    Bursts of up to ``num`` requests, refilled at ``num`` per ``duration``.
+    State: ``(tokens, updated, wait)``.
+    """
+
+    def step(self, state, now):
+        tokens, updated, _ = state or (self.num, now, None)
+        refill = self.num / self.duration
+        tokens = min(self.num, tokens + (now - updated) * refill)
+        if tokens >= 1:
+            return tokens - 1, now, None
+        return tokens, now, (1 - tokens) / refill
+
+
+class SlidingWindowThrottle(CacheThrottle):
+    """
+    At most ``num`` requests in any ``duration``, estimated from the counts of
+    the current and previous fixed windows, the previous one weighted by how
+    much of it still overlaps the sliding window.
+    State: ``(window_start, previous, current, wait)``.
+    """
+
+    def step(self, state, now):
+        start = now - now % self.duration
+        previous = current = 0
+        if state is not None:
+            last_start, last_previous, last_current, _ = state
+            if last_start == start:
+                previous, current = last_previous, last_current
+            elif last_start == start - self.duration:
+                previous = last_current
+
+        elapsed = now - start
+        if previous * (1 - elapsed / self.duration) + current < self.num:
+            return start, previous, current + 1, None
+        if current >= self.num:
+            wait = self.duration - elapsed
+        else:
+            wait = self.duration * (1 - (self.num - current) / previous) - elapsed
+        return start, previous, current, max(wait, 0)
+
+
+class RequestEmailMixin:
+    """Limits per ``gmail`` address in the request body instead of per client."""
+
+    def get_ident_value(self, request, view):
+        gmail = request.data.get("gmail") if hasattr(request.data, "get") else None
+        return gmail.strip().lower() if isinstance(gmail, str) and gmail.strip() else None
+
+
+class ContactIPThrottle(TokenBucketThrottle):
+    scope = "contact_ip"
+
+
+class ContactEmailThrottle(RequestEmailMixin, TokenBucketThrottle):
+    scope = "contact_email"
+
+
+class VerifyIPThrottle(TokenBucketThrottle):
+    scope = "verify_ip"
+
+
+class VerifyAttemptsThrottle(RequestEmailMixin, SlidingWindowThrottle):
+    scope = "verify_email"
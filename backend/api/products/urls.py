@@ -1,6 +1,7 @@
+from django.urls import path
 from rest_framework import routers
 
-
+from . import async_views
 from .viewsets import (
     CategoryViewSet,
     ProductViewSet,
@@ -8,7 +9,14 @@ from .viewsets import (
     ContactViewSet
 )
 
-urlpatterns = []
+# Same responses as the plain list/retrieve requests below, for ASGI workers.
+urlpatterns = [
+    path('async/categories/', async_views.category_list, name='async-categories-list'),
+    path('async/categories/<int:pk>/', async_views.category_detail, name='async-categories-detail'),
+    path('async/products/', async_views.product_list, name='async-products-list'),
+    path('async/products/<int:pk>/', async_views.product_detail, name='async-products-detail'),
+    path('async/banners/', async_views.banner_list, name='async-banners-list'),
+]
 
 
 router = routers.DefaultRouter()
@@ -1,24 +1,50 @@
-from drf_spectacular.utils import OpenApiResponse
+from drf_spectacular.utils import OpenApiResponse, OpenApiParameter
 from drf_spectacular.utils import extend_schema
-from apps.products.models import Product, Category, Banner
+from apps.products.models import Product, Category, Banner, Image, CatalogEntry
+from apps.products.suggest import suggest_index
 from apps.contact.models import Contact
-from .serializers import CategorySerializer, ProductSerializer, BannerSerializer , ContactSerializer,ContactVerificationSerializer
+from .serializers import CategorySerializer, PaginatedCategorySerializer, ProductSerializer, BannerSerializer, SuggestionSerializer, ContactSerializer,ContactVerificationSerializer
 from django.core.cache import cache
 from rest_framework.viewsets import  ModelViewSet
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import status
-from rest_framework.filters import SearchFilter
+from django_filters.rest_framework import DjangoFilterBackend
+from .filters import FullTextSearchFilter
+from .compact import CompactBannerSerializer, CompactCategorySerializer, CompactProductSerializer
+from .mixins import (
+    CachedResponseMixin, CatalogReadModelMixin, CompactSerializerMixin, ConditionalGetMixin, QueryPlanMixin,
+    StreamingListMixin,
+)
+from .throttling import ContactEmailThrottle, ContactIPThrottle, VerifyAttemptsThrottle, VerifyIPThrottle
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter("fields", str, description="Comma-separated fields to return, dotted for nested ones: id,name,images.image."),
+    OpenApiParameter("expand", str, description="Comma-separated related fields to return as objects instead of ids: category."),
+]
+STREAM_PARAMETER = OpenApiParameter("stream", bool, description="Stream the unpaginated list, for whole-catalog downloads.")
 
 @extend_schema(
     tags=["Categories"],
     summary="Categories",
     responses=CategorySerializer,
+    parameters=[*SPARSE_FIELDS_PARAMETERS, STREAM_PARAMETER],
 )
-class CategoryViewSet(ModelViewSet):
+class CategoryViewSet(
+    ConditionalGetMixin, CachedResponseMixin, CatalogReadModelMixin, StreamingListMixin, CompactSerializerMixin,
+    QueryPlanMixin, ModelViewSet,
+):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    compact_serializer_class = CompactCategorySerializer
     http_method_names = ["get"]
+    cache_models = [Category, Product, Image]
+    catalog_kind = CatalogEntry.Kind.CATEGORY
+
+    def get_serializer_class(self):
+        if self.request is not None and self.paginator.is_requested(self.request):
+            return PaginatedCategorySerializer
+        return super().get_serializer_class()
 
 
 
@@ -26,19 +52,40 @@ class CategoryViewSet(ModelViewSet):
     tags=["Products"],
     summary="Products",
     responses=ProductSerializer,
+    parameters=[*SPARSE_FIELDS_PARAMETERS, STREAM_PARAMETER],
 )
-class ProductViewSet(ModelViewSet):
+class ProductViewSet(
+    ConditionalGetMixin, CachedResponseMixin, CatalogReadModelMixin, StreamingListMixin, CompactSerializerMixin,
+    QueryPlanMixin, ModelViewSet,
+):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    compact_serializer_class = CompactProductSerializer
     http_method_names = ["get",]
-    filter_backends = [SearchFilter]
-    search_fields = ['name']
+    cache_models = [Product, Image]
+    catalog_kind = CatalogEntry.Kind.PRODUCT
+    catalog_filters = ['category']
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    filterset_fields = ['category']
+
+    @extend_schema(
+        summary="Search suggestions",
+        description="Product and category names (id and name only) starting with the typed words, in the active language.",
+        parameters=[OpenApiParameter("q", str, description="Text typed so far.")],
+        responses=SuggestionSerializer,
+    )
+    @action(detail=False, methods=['get'], url_path='suggest', pagination_class=None)
+    def suggest(self, request):
+        return Response(suggest_index.suggest(request.query_params.get('q', '')))
 
 
-class BannerViewSet(ModelViewSet):
+@extend_schema(parameters=SPARSE_FIELDS_PARAMETERS)
+class BannerViewSet(ConditionalGetMixin, CachedResponseMixin, CompactSerializerMixin, QueryPlanMixin, ModelViewSet):
     queryset = Banner.objects.all()
     serializer_class = BannerSerializer
+    compact_serializer_class = CompactBannerSerializer
     http_method_names = ["get",]
+    cache_models = [Banner]
 
 
 
@@ -52,6 +99,7 @@ class ContactViewSet(ModelViewSet):
     queryset = Contact.objects.all()
     serializer_class = ContactSerializer
     http_method_names = ['post']
+    throttle_classes = [ContactIPThrottle, ContactEmailThrottle]
 
     @extend_schema(
         summary="Create new comment",
@@ -64,6 +112,7 @@ class ContactViewSet(ModelViewSet):
         responses={
             201: OpenApiResponse(description="Verification code was sent to provided email."),
             400: OpenApiResponse(description="Invalid datas you provided or check your internet connection."),
+            429: OpenApiResponse(description="Too many requests, retry after the Retry-After header's seconds."),
         },
     )
 
@@ -86,10 +135,12 @@ class ContactViewSet(ModelViewSet):
         responses={
             201: OpenApiResponse(description="Email verified and contact saved successfully."),
             400: OpenApiResponse(description="Invalid or expired verification code."),
+            429: OpenApiResponse(description="Too many requests, retry after the Retry-After header's seconds."),
         },
     )
 
-    @action(detail=False, methods=['post'], url_path='verify-email')
+    @action(detail=False, methods=['post'], url_path='verify-email',
+            throttle_classes=[VerifyIPThrottle, VerifyAttemptsThrottle])
     def verify_email(self, request):
 
         serializer = ContactVerificationSerializer(data=request.data)
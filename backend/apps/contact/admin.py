@@ -1,3 +1,62 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from import_export.admin import ImportExportModelAdmin
 
-# Register your models here.
+from apps.contact.models import Contact
+from apps.utils.exports import StreamingExportMixin
+
+CURSOR_VAR = "cursor"
+
+
+class KeysetPaginator:
+    """What the pagination template needs from ``cl.paginator``; there are no page numbers."""
+
+    template_name = "admin/contact/keyset_pagination.html"
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Newest first, paged with ``?cursor=<last id>`` instead of ``?p=<n>``: a
+    page is one indexed range scan and nothing is counted.
+    """
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(CURSOR_VAR, None)
+        return params
+
+    def get_results(self, request):
+        cursor = request.GET.get(CURSOR_VAR, "")
+        queryset = self.queryset.order_by("-pk")
+        if cursor:
+            if not cursor.isdigit():
+                raise IncorrectLookupParameters
+            queryset = queryset.filter(pk__lt=int(cursor))
+        rows = list(queryset[: self.list_per_page + 1])
+
+        self.result_list = rows[: self.list_per_page]
+        self.result_count = len(self.result_list)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = KeysetPaginator()
+        self.first_page_url = self.get_query_string(remove=[CURSOR_VAR]) if cursor else None
+        self.next_page_url = (
+            self.get_query_string({CURSOR_VAR: self.result_list[-1].pk}) if len(rows) > self.list_per_page else None
+        )
+
+
+@admin.register(Contact)
+class ContactAdmin(StreamingExportMixin, ImportExportModelAdmin):
+    list_display = ['username', 'gmail', 'is_verified']
+    list_filter = ['is_verified']
+    search_fields = ['=gmail']
+    ordering = ['-id']
+    sortable_by = []
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,72 @@
+import html
+import re
+import secrets
+
+from django.template.loader import get_template
+from django.utils.safestring import SafeData
+from django.utils.translation import get_language, override
+
+
+def escape(value):
+    # What autoescaping does to {{ value }}, without django.utils.html.escape's lazy wrappers.
+    return value if isinstance(value, SafeData) else html.escape(str(value))
+
+
+class PrecompiledTemplate:
+    """
+    An email template whose static parts are rendered once per process and
+    language; sending a message only escapes and joins in ``variables``.
+
+    The template is rendered with a random marker in place of each variable
+    and split on the markers. A second render with other markers must give
+    the same text, otherwise a variable affects more than its own output
+    (a filter or an ``{% if %}``) and every message is rendered in full.
+    """
+
+    def __init__(self, name, variables):
+        self.name = name
+        self.variables = tuple(variables)
+        self.parts = {}
+
+    def markers(self):
+        token = secrets.token_hex(8)
+        return {name: f"[[{token}:{name}]]" for name in self.variables}
+
+    def compile(self):
+        template = get_template(self.name)
+        first, second = self.markers(), self.markers()
+        text = template.render(first)
+        expected = text
+        for name in self.variables:
+            expected = expected.replace(first[name], second[name])
+        if template.render(second) != expected:
+            return None
+
+        pattern = re.compile("|".join(re.escape(marker) for marker in first.values()))
+        names = {marker: name for name, marker in first.items()}
+        # Static text and variable names alternate: [text, name, text, ...].
+        parts = []
+        position = 0
+        for match in pattern.finditer(text):
+            parts += [text[position:match.start()], names[match.group()]]
+            position = match.end()
+        parts.append(text[position:])
+        return parts
+
+    def render(self, context, lang=None):
+        lang = lang or get_language()
+        if lang not in self.parts:
+            with override(lang):
+                self.parts[lang] = self.compile()
+        parts = self.parts[lang]
+        if parts is None:
+            with override(lang):
+                return get_template(self.name).render(context)
+        return "".join(
+            part if index % 2 == 0 else escape(context[part])
+            for index, part in enumerate(parts)
+        )
+
+
+
+verification_email = PrecompiledTemplate("emails/user_verification.html", ["code", "current_year"])
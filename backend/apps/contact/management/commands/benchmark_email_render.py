@@ -0,0 +1,31 @@
+import timeit
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from apps.contact.emails import PrecompiledTemplate
+
+
+class Command(BaseCommand):
+    help = "Compare per-message render time of the verification email: render_to_string vs the precompiled template."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=2000, help="Renders per measurement.")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        name = "emails/user_verification.html"
+        context = {"code": "123456", "current_year": datetime.now().year}
+        template = PrecompiledTemplate(name, context)
+        if template.render(context) != render_to_string(name, context):
+            self.stderr.write(self.style.ERROR("Precompiled output differs from render_to_string."))
+            return
+
+        runs = {
+            "render_to_string": lambda: render_to_string(name, context),
+            "precompiled": lambda: template.render(context),
+        }
+        for label, run in runs.items():
+            best = min(timeit.repeat(run, number=options["number"], repeat=options["repeat"]))
+            self.stdout.write(f"{label:>16}: {best / options['number'] * 1e6:8.1f} us/message")
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['gmail'], name='contact_gmail_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['is_verified', '-id'], name='contact_verified_idx'),
+        ),
+    ]
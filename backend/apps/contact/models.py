@@ -15,3 +15,8 @@ class Contact(models.Model):
     class Meta:
         verbose_name = 'contact'
         verbose_name_plural = 'contacts'
+        indexes = [
+            models.Index(fields=['gmail'], name='contact_gmail_idx'),
+            # Admin list and export: newest first, optionally only (un)verified.
+            models.Index(fields=['is_verified', '-id'], name='contact_verified_idx'),
+        ]
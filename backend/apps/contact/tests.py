@@ -1,3 +1,226 @@
-from django.test import TestCase
+import json
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import engines
+from django.template.loader import render_to_string
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from import_export.resources import modelresource_factory
+
+from apps.contact.admin import CURSOR_VAR
+from apps.contact.emails import PrecompiledTemplate, verification_email
+from api.products.throttling import SlidingWindowThrottle, TokenBucketThrottle, parse_rate
+from apps.contact.models import Contact
+from apps.utils.models import OutgoingEmail
+
+
+class ContactVerificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def submit(self, gmail="user@gmail.com"):
+        return self.client.post(
+            "/api/v1/gyrat/contacts/",
+            {"username": "User", "gmail": gmail, "comment": "Hello"},
+            content_type="application/json",
+        )
+
+    def test_submission_only_queues_the_email(self):
+        self.assertEqual(self.submit().status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.to, email.status), (["user@gmail.com"], OutgoingEmail.Status.PENDING))
+
+        call_command("send_emails", once=True, stdout=StringIO())
+
+        [message] = mail.outbox
+        code = cache.get("verification_user@gmail.com")["code"]
+        self.assertIn(code, message.body)
+        self.assertIn(code, message.alternatives[0][0])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutgoingEmail.Status.DONE, 1))
+
+    def test_verify_email_saves_contact(self):
+        self.submit()
+        code = cache.get("verification_user@gmail.com")["code"]
+        response = self.client.post(
+            "/api/v1/gyrat/contacts/verify-email/",
+            {"gmail": "user@gmail.com", "verification_code": code},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Contact.objects.get(gmail="user@gmail.com").is_verified)
+        self.assertIsNone(cache.get("verification_user@gmail.com"))
+
+    def test_failed_save_keeps_the_code(self):
+        self.submit()
+        code = cache.get("verification_user@gmail.com")["code"]
+        self.client.raise_request_exception = False
+        with mock.patch.object(Contact.objects, "create", side_effect=RuntimeError):
+            response = self.client.post(
+                "/api/v1/gyrat/contacts/verify-email/",
+                {"gmail": "user@gmail.com", "verification_code": code},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(cache.get("verification_user@gmail.com")["code"], code)
+
+
+class PrecompiledTemplateTests(TestCase):
+    def test_matches_render_to_string(self):
+        for context in ({"code": "123456", "current_year": 2026}, {"code": "<b>&", "current_year": 1999}):
+            self.assertEqual(
+                verification_email.render(context),
+                render_to_string("emails/user_verification.html", context),
+            )
+
+    def test_compiled_once_per_language(self):
+        template = PrecompiledTemplate("emails/user_verification.html", ["code", "current_year"])
+        template.render({"code": "1", "current_year": 1}, lang="tk")
+        with mock.patch("apps.contact.emails.get_template") as get_template:
+            template.render({"code": "2", "current_year": 2}, lang="tk")
+        get_template.assert_not_called()
+        template.render({"code": "3", "current_year": 3}, lang="ru")
+        self.assertEqual(sorted(template.parts), ["ru", "tk"])
+
+    def test_falls_back_when_a_variable_drives_the_template(self):
+        source = "{% if code == '1' %}one{% endif %}<p>{{ code|upper }}</p>"
+        with mock.patch("apps.contact.emails.get_template", return_value=engines["django"].from_string(source)):
+            template = PrecompiledTemplate("conditional.html", ["code"])
+            self.assertEqual(template.render({"code": "1"}), "one<p>1</p>")
+            self.assertIsNone(template.parts["tk"])
+            self.assertEqual(template.render({"code": "a"}), "<p>A</p>")
+
+
+ContactResource = modelresource_factory(Contact)
+
+
+class ContactAdminTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        Contact.objects.bulk_create(
+            Contact(username=f"user{i}", gmail=f"user{i}@gmail.com", comment="Hi", is_verified=i % 2 == 0)
+            for i in range(250)
+        )
+
+    def test_keyset_pages_without_count(self):
+        url, seen = "/admin/contact/contact/?is_verified__exact=1", []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse([query for query in queries if "COUNT(" in query["sql"]])
+            self.assertContains(response, "Newest")
+            seen += [contact.pk for contact in response.context["cl"].result_list]
+            next_url = response.context["cl"].next_page_url
+            url = f"/admin/contact/contact/{next_url}" if next_url else None
+        expected = Contact.objects.filter(is_verified=True).order_by("-pk").values_list("pk", flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f"/admin/contact/contact/?{CURSOR_VAR}=abc")
+        self.assertEqual(response.status_code, 302)
+
+    def export(self, file_format, fields=("id", "username", "gmail")):
+        data = {"format": file_format, "resource": 0, **{f"contactresource_{field}": "on" for field in fields}}
+        response = self.client.post("/admin/contact/contact/export/", data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response
+
+    def test_export_streams_csv_and_json_lines(self):
+        with CaptureQueriesContext(connection) as queries:
+            content = b"".join(self.export(0).streaming_content)
+        self.assertFalse([query for query in queries if "COUNT(" in query["sql"]])
+        expected = ContactResource().export(Contact.objects.order_by("-id"), export_fields=["id", "username", "gmail"])
+        self.assertEqual(content.decode(), expected.csv)
+
+        response = self.export(1)
+        self.assertIn(".jsonl", response["Content-Disposition"])
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 250)
+        newest = Contact.objects.latest("id")
+        self.assertEqual(json.loads(lines[0]), {"id": str(newest.pk), "username": newest.username, "gmail": newest.gmail})
+
+
+RATES = {"contact_ip": "5/hour", "contact_email": "2/hour", "verify_ip": "100/hour", "verify_email": "3/10m"}
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": RATES})
+class ContactThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def post(self, path, data, ip="10.0.0.1", **extra):
+        return self.client.post(path, data, content_type="application/json", REMOTE_ADDR=ip, **extra)
+
+    def submit(self, gmail, ip="10.0.0.1", **extra):
+        return self.post("/api/v1/gyrat/contacts/", {"username": "User", "gmail": gmail, "comment": "Hi"}, ip, **extra)
+
+    def test_email_bucket_rejects_before_any_mail_work(self):
+        self.assertEqual(self.submit("a@gmail.com").status_code, 200)
+        self.assertEqual(self.submit("A@gmail.com ", ip="10.0.0.2").status_code, 200)
+        response = self.submit("a@gmail.com", ip="10.0.0.3")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+
+    def test_ip_bucket(self):
+        statuses = [self.submit(f"user{i}@gmail.com").status_code for i in range(6)]
+        self.assertEqual(statuses, [200] * 5 + [429])
+        self.assertEqual(self.submit("other@gmail.com", ip="10.0.0.9").status_code, 200)
+
+    def test_forwarded_for_does_not_reset_the_ip_bucket(self):
+        statuses = [
+            self.submit(f"user{i}@gmail.com", HTTP_X_FORWARDED_FOR=f"203.0.113.{i}").status_code for i in range(6)
+        ]
+        self.assertEqual(statuses, [200] * 5 + [429])
+
+    def test_verification_attempts(self):
+        self.submit("a@gmail.com")
+        code = cache.get("verification_a@gmail.com")["code"]
+        wrong = str((int(code) + 1) % 1000000).zfill(6)
+        for _ in range(3):
+            response = self.post("/api/v1/gyrat/contacts/verify-email/", {"gmail": "a@gmail.com", "verification_code": wrong})
+            self.assertEqual(response.status_code, 400)
+        response = self.post("/api/v1/gyrat/contacts/verify-email/", {"gmail": "a@gmail.com", "verification_code": code})
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(Contact.objects.exists())
+
+
+class ThrottleAlgorithmTests(TestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("5/10m"), (5, 600))
+        self.assertEqual(parse_rate("20/hour"), (20, 3600))
+
+    def test_token_bucket_refills(self):
+        throttle = TokenBucketThrottle()
+        throttle.num, throttle.duration = 2, 60
+        state = throttle.step(None, 0)
+        state = throttle.step(state, 0)
+        self.assertIsNone(state[-1])
+        state = throttle.step(state, 0)
+        self.assertEqual(state[-1], 30)
+        self.assertIsNone(throttle.step(state, 30)[-1])
+
+    def test_sliding_window_weights_previous_window(self):
+        throttle = SlidingWindowThrottle()
+        throttle.num, throttle.duration = 4, 60
+        state = None
+        for now in (50, 51, 52, 53):
+            state = throttle.step(state, now)
+            self.assertIsNone(state[-1])
+        # 10 s into the next window 5/6 of the previous one still count: 3.3 + 1.
+        state = throttle.step(state, 70)
+        self.assertIsNone(state[-1])
+        state = throttle.step(state, 70)
+        self.assertAlmostEqual(state[-1], 5)
+        self.assertIsNone(throttle.step(state, 76)[-1])
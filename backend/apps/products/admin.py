@@ -2,7 +2,9 @@ from import_export.admin import ImportExportModelAdmin
 from unfold.admin import ModelAdmin as UnfoldAdmin, TabularInline
 from django.contrib import admin
 from apps.products.models import Product, Category, Image, Banner
-from apps.contact.models import Contact
+from apps.products.resources import BannerResource, CategoryResource, ProductResource
+from apps.utils.exports import StreamingExportMixin
+
 
 class ImageInline(TabularInline):
     model = Image
@@ -10,10 +12,16 @@ class ImageInline(TabularInline):
     min_num = 3
     fields = ['image']  # ✅ ensure this is visible in admin
 
-class ProductAdmin(UnfoldAdmin, ImportExportModelAdmin):
+class ProductAdmin(StreamingExportMixin, UnfoldAdmin, ImportExportModelAdmin):
     inlines = [ImageInline]
+    resource_classes = [ProductResource]
+
+class CategoryAdmin(ImportExportModelAdmin):
+    resource_classes = [CategoryResource]
+
+class BannerAdmin(ImportExportModelAdmin):
+    resource_classes = [BannerResource]
 
 admin.site.register(Product, ProductAdmin)
-admin.site.register(Category, ImportExportModelAdmin)
-admin.site.register(Contact, ImportExportModelAdmin)
-admin.site.register(Banner, ImportExportModelAdmin)
+admin.site.register(Category, CategoryAdmin)
+admin.site.register(Banner, BannerAdmin)
@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ProductsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.products"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(build_catalog_entries, sender=self)
+
+
+def build_catalog_entries(using, **kwargs):
+    """Fill the catalog read model the first time it is migrated into a database with data."""
+    from api.products import catalog
+    from apps.products.models import CatalogEntry, Category, Product
+
+    if not CatalogEntry.objects.using(using).exists() and (
+        Category.objects.using(using).exists() or Product.objects.using(using).exists()
+    ):
+        catalog.rebuild(using)
@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from import_export import resources
+from tablib import Dataset
+
+from apps.products.models import Category, Product
+from apps.products.resources import ProductResource
+
+
+class PerRowProductResource(resources.ModelResource):
+    """The import-export defaults, matching rows on their id as well."""
+
+    class Meta:
+        model = Product
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def price_list(rows, categories, existing=(), images=0.0) -> Dataset:
+    """A price list of ``rows`` products, the first of them the ``existing`` ids of the catalog."""
+    dataset = Dataset(headers=["id", "name", "price", "category", "description", "image"])
+    for row in range(rows):
+        pk = existing[row] if row < len(existing) else ""
+        image = f"https://images.example.com/{row}.jpg" if row < rows * images else ""
+        dataset.append([pk, f"Haryt {row}", f"{10 + row % 990}.50", categories[row % len(categories)], "Ýokary hilli önüm.", image])
+    return dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Time a catalog price-list import: import-export's per-row defaults against ProductResource. "
+        "Every run is rolled back, the database is left as it was."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000)
+        parser.add_argument("--categories", type=int, default=50)
+        parser.add_argument("--existing", type=float, default=0.5, help="Share of rows that update existing products.")
+        parser.add_argument("--images", type=float, default=0.2, help="Share of rows with an image URL.")
+        parser.add_argument("--skip-per-row", action="store_true", help="Only time ProductResource.")
+
+    def handle(self, *args, **options):
+        runs = {"per-row": PerRowProductResource, "bulk": ProductResource}
+        if options["skip_per_row"]:
+            del runs["per-row"]
+        for label, resource_class in runs.items():
+            with transaction.atomic():
+                elapsed, queries, result = self.run(resource_class, options)
+                transaction.set_rollback(True)
+            totals = ", ".join(f"{count} {kind}" for kind, count in result.totals.items() if count)
+            self.stdout.write(f"{label:>8}: {elapsed:7.1f} s, {queries:>7} queries ({totals})")
+
+    def run(self, resource_class, options):
+        categories = Category.objects.bulk_create(
+            Category(name=f"Benchmark {index}", description="") for index in range(options["categories"])
+        )
+        rows = options["rows"]
+        existing = Product.objects.bulk_create(
+            (
+                Product(name=f"Haryt {row}", price=1, category=categories[0], description="", image="")
+                for row in range(int(rows * options["existing"]))
+            ),
+            batch_size=1000,
+        )
+        dataset = price_list(
+            rows, [category.pk for category in categories], [product.pk for product in existing], options["images"],
+        )
+
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            result = resource_class().import_data(dataset, use_transactions=True)
+            elapsed = time.perf_counter() - started
+        return elapsed, counter.count, result
@@ -0,0 +1,80 @@
+import timeit
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.products import renderers
+
+MEDIA = "https://example.com/media"
+
+
+def variants(name):
+    sizes = {
+        label: {
+            "width": width,
+            "height": width * 2 // 3,
+            "avif": f"{MEDIA}/{name}-{width}.avif",
+            "webp": f"{MEDIA}/{name}-{width}.webp",
+        }
+        for label, width in (("small", 480), ("medium", 960), ("large", 1600))
+    }
+    return {
+        "srcset": {
+            ext: ", ".join(f"{size[ext]} {size['width']}w" for size in sizes.values()) for ext in ("avif", "webp")
+        },
+        "sizes": sizes,
+    }
+
+
+def catalog_payload(products, per_category=50, images=3):
+    """``CategorySerializer`` output for ``products`` products, media variants included."""
+    categories = []
+    for pk in range(products):
+        if pk % per_category == 0:
+            category = len(categories) + 1
+            categories.append({"id": category, "name": f"Kategoriýa {category}", "products": []})
+        categories[-1]["products"].append({
+            "id": pk,
+            "name": f"Haryt {pk} — Товар",
+            "price": f"{10 + pk % 990}.50",
+            "images": [
+                {"image": f"{MEDIA}/products/images/{pk}-{i}.webp", "image_variants": variants(f"products/images/{pk}-{i}")}
+                for i in range(images)
+            ],
+            "description": "Ýokary hilli önüm, kepillik bilen. Качественный товар с гарантией. " * 4,
+            "category": category,
+            "image": f"{MEDIA}/product/{pk}.webp",
+            "image_variants": variants(f"product/{pk}"),
+        })
+    return categories
+
+
+class Command(BaseCommand):
+    help = "Compare render and parse time of a categories payload: DRF's JSON renderer vs the orjson one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=5000)
+        parser.add_argument("--number", type=int, default=5, help="Renders per measurement.")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stderr.write(self.style.WARNING("orjson is not installed, the fast renderer falls back to json."))
+        data = catalog_payload(options["products"])
+        content = JSONRenderer().render(data)
+        if renderers.FastJSONRenderer().render(data) != content:
+            self.stderr.write(self.style.ERROR("The fast renderer's output differs from JSONRenderer."))
+            return
+        self.stdout.write(f"{options['products']} products, {len(content) / 1e6:.1f} MB")
+
+        runs = {
+            "render json": lambda: JSONRenderer().render(data),
+            "render orjson": lambda: renderers.FastJSONRenderer().render(data),
+            "parse json": lambda: JSONParser().parse(BytesIO(content)),
+            "parse orjson": lambda: renderers.FastJSONParser().parse(BytesIO(content)),
+        }
+        for label, run in runs.items():
+            best = min(timeit.repeat(run, number=options["number"], repeat=options["repeat"]))
+            self.stdout.write(f"{label:>14}: {best / options['number'] * 1e3:8.1f} ms")
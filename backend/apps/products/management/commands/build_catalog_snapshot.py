@@ -0,0 +1,46 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.products import snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the categories, products and banners responses per language as static, "
+        "precompressed JSON files with a versioned manifest, for the web server to serve directly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--root", default=None, help="Defaults to CATALOG_SNAPSHOT_ROOT.")
+        parser.add_argument("--base-url", default=None, help="Prefix of media URLs, defaults to CATALOG_SNAPSHOT_BASE_URL.")
+        parser.add_argument("--keep", type=int, default=3, help="Published versions to keep.")
+        parser.add_argument("--watch", action="store_true", help="Keep running and republish after catalog changes.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds between checks for changes.")
+        parser.add_argument("--quiet", type=float, default=10.0, help="Seconds without changes before republishing.")
+        parser.add_argument("--max-delay", type=float, default=60.0, help="Seconds a change waits at most.")
+
+    def handle(self, *args, **options):
+        if not options["watch"]:
+            self.build(options)
+            return
+
+        debounce = snapshot.Debounce(options["quiet"], options["max_delay"])
+        while True:
+            current = snapshot.generations()
+            if debounce.due(current, time.monotonic()):
+                try:
+                    self.build(options)
+                except Exception:
+                    # Tried again on the next check.
+                    logger.exception("Building the catalog snapshot failed")
+                else:
+                    debounce.built(current)
+            time.sleep(options["sleep"])
+
+    def build(self, options):
+        manifest = snapshot.build(options["root"], options["base_url"], options["keep"])
+        self.stdout.write(self.style.SUCCESS(f"Catalog snapshot {manifest['version']} published."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from PIL import UnidentifiedImageError
+
+from apps.products.models import Banner, Image, Product
+from apps.utils.fields import CompressedImageSpec, CompressedMixin, ImageTooLarge, build_variants
+
+
+class Command(BaseCommand):
+    help = "Generate responsive image variants for images uploaded before variants existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rebuild variants that already exist too.")
+
+    def handle(self, *args, **options):
+        for model in (Product, Image, Banner):
+            for field in model._meta.fields:
+                if isinstance(field, CompressedMixin) and field.variants_field:
+                    self.build(model, field, options["all"])
+
+    def build(self, model, field, rebuild):
+        queryset = model.objects.exclude(**{field.name: ""}).exclude(**{f"{field.name}__isnull": True})
+        if not rebuild:
+            queryset = queryset.filter(**{field.variants_field: {}})
+
+        done = 0
+        for pk, name in queryset.values_list("pk", field.name).iterator():
+            try:
+                with field.storage.open(name) as source:
+                    image = CompressedImageSpec.open(source)
+                    variants = build_variants(field.storage, name, image, field.variants)
+            except (FileNotFoundError, UnidentifiedImageError, ImageTooLarge) as error:
+                self.stderr.write(f"{model.__name__} {pk}: {error}")
+                continue
+            model.objects.filter(pk=pk).update(**{field.variants_field: variants})
+            done += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{model.__name__}.{field.name}: {done} image(s) processed."))
@@ -0,0 +1,103 @@
+import asyncio
+import socket
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+async def fetch(host, port, path, read_size, read_delay):
+    """One GET from a slow client: small receive buffer, a pause after every read."""
+    started = time.perf_counter()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # A small receive buffer makes the server wait on the client, as on a slow mobile link.
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, read_size)
+    sock.setblocking(False)
+    try:
+        await asyncio.get_running_loop().sock_connect(sock, (host, port))
+    except OSError:
+        sock.close()
+        raise
+    reader, writer = await asyncio.open_connection(sock=sock, limit=read_size)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        first_byte = time.perf_counter() - started
+        while await reader.read(read_size):
+            if read_delay:
+                await asyncio.sleep(read_delay)
+    finally:
+        writer.close()
+    return status, first_byte, time.perf_counter() - started
+
+
+async def run_level(host, port, path, concurrency, total, read_size, read_delay):
+    results, errors = [], 0
+    remaining = iter(range(total))
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            try:
+                status, first_byte, elapsed = await fetch(host, port, path, read_size, read_delay)
+            except (OSError, ValueError, IndexError):
+                errors += 1
+                continue
+            if status != 200:
+                errors += 1
+            results.append((first_byte, elapsed))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return results, errors, time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    return statistics.quantiles(values, n=100)[int(fraction * 100) - 1] if len(values) > 1 else values[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test catalog endpoints on a running server with concurrent slow clients, e.g. the sync "
+        "/categories/ against /async/categories/ on one ASGI worker "
+        "(uvicorn config.asgi:application --workers 1)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server to test, plain HTTP.")
+        parser.add_argument(
+            "--path", action="append", dest="paths",
+            help="Endpoint to test, repeatable. Default: the sync and the async categories list.",
+        )
+        parser.add_argument("--concurrency", default="1,10,50,100", help="Comma-separated client counts.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level.")
+        parser.add_argument("--read-size", type=int, default=16 * 1024, help="Bytes a client reads at once.")
+        parser.add_argument("--read-delay", type=float, default=0.02, help="Seconds a client waits between reads.")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("--url must be a plain http:// URL.")
+        host, port = url.hostname, url.port or 80
+        paths = options["paths"] or ["/api/v1/gyrat/categories/", "/api/v1/gyrat/async/categories/"]
+        levels = [int(level) for level in options["concurrency"].split(",")]
+
+        self.stdout.write(f"{'path':<36} {'clients':>7} {'req/s':>8} {'ttfb p50':>9} {'p50':>8} {'p95':>8} {'errors':>6}")
+        for path in paths:
+            for concurrency in levels:
+                results, errors, elapsed = asyncio.run(run_level(
+                    host, port, url.path.rstrip("/") + path, concurrency, options["requests"],
+                    options["read_size"], options["read_delay"],
+                ))
+                if not results:
+                    self.stdout.write(f"{path:<36} {concurrency:>7} {'-':>8} {'-':>9} {'-':>8} {'-':>8} {errors:>6}")
+                    continue
+                first_bytes = [first_byte for first_byte, _ in results]
+                latencies = [latency for _, latency in results]
+                self.stdout.write(
+                    f"{path:<36} {concurrency:>7} {len(results) / elapsed:>8.1f} "
+                    f"{percentile(first_bytes, 0.5) * 1e3:>7.0f}ms {percentile(latencies, 0.5) * 1e3:>6.0f}ms "
+                    f"{percentile(latencies, 0.95) * 1e3:>6.0f}ms {errors:>6}"
+                )
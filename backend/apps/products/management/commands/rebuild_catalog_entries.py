@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from api.products import catalog
+
+
+class Command(BaseCommand):
+    help = "Re-render the catalog read model, e.g. after bulk imports or queryset updates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        catalog.rebuild(options["database"])
+        self.stdout.write(self.style.SUCCESS("Catalog entries rebuilt."))
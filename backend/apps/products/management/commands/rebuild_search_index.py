@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from apps.products.search import get_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index, e.g. after bulk imports or queryset updates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        with transaction.atomic(using=options["database"]):
+            get_search_index(options["database"]).rebuild()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
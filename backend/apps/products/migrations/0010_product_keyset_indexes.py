@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_image_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-date_created', 'id'], name='product_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', '-date_created', 'id'], name='product_category_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+COLUMNS = "name_tk, name_en, name_ru, description_tk, description_en, description_ru"
+WEIGHTS = "'A', 'A', 'A', 'D', 'D', 'D'"
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE products_product_search USING fts5({COLUMNS}, "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        sources = ", ".join(f"COALESCE({column}, '')" for column in COLUMNS.split(", "))
+        schema_editor.execute(
+            f"INSERT INTO products_product_search (rowid, {COLUMNS}) "
+            f"SELECT id, {sources} FROM products_product"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE TABLE products_product_search ("
+            "product_id bigint PRIMARY KEY REFERENCES products_product (id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX products_product_search_document ON products_product_search USING GIN (document)"
+        )
+        document = " || ".join(
+            f"setweight(to_tsvector('simple', COALESCE({column}, '')), {weight})"
+            for column, weight in zip(COLUMNS.split(", "), WEIGHTS.split(", "))
+        )
+        schema_editor.execute(
+            f"INSERT INTO products_product_search (product_id, document) "
+            f"SELECT id, {document} FROM products_product"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute("DROP TABLE products_product_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:31
+
+import apps.utils.fields
+import apps.utils.files
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banner',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='banner',
+            name='image',
+            field=apps.utils.fields.CompressedImageField(upload_to=apps.utils.files.upload_file, variants=('card', 'detail', 'banner'), variants_field='image_variants'),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='image',
+            field=apps.utils.fields.CompressedImageField(blank=True, null=True, upload_to='products/images', variants=('thumbnail', 'card', 'detail'), variants_field='image_variants'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=apps.utils.fields.CompressedImageField(upload_to=apps.utils.files.upload_file, variants=('thumbnail', 'card', 'detail'), variants_field='image_variants'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Category'), ('product', 'Product')], max_length=10)),
+                ('language', models.CharField(max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('category_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('data', models.TextField()),
+            ],
+            options={
+                'verbose_name_plural': 'Catalog entries',
+                'indexes': [models.Index(fields=['kind', 'language', 'category_id', 'object_id'], name='catalogentry_category_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'language', 'object_id'), name='catalogentry_unique')],
+            },
+        ),
+    ]
@@ -19,7 +19,8 @@ class Product(BaseModel):
     category = models.ForeignKey(Category, on_delete=models.CASCADE,related_name='products',null=True,blank=True)
     name = models.CharField(max_length=255,db_index=True)
     price = models.FloatField()
-    image = CompressedImageField()
+    image = CompressedImageField(variants=('thumbnail', 'card', 'detail'), variants_field='image_variants')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField()
     def __str__(self):
         return self.name
@@ -27,10 +28,16 @@ class Product(BaseModel):
     class Meta:
         verbose_name_plural = "Products"
         verbose_name = "Product"
+        indexes = [
+            models.Index(fields=['-date_created', 'id'], name='product_keyset_idx'),
+            models.Index(fields=['category', '-date_created', 'id'], name='product_category_keyset_idx'),
+        ]
 
 
 class Image(BaseModel):
-    image = CompressedImageField(upload_to='products/images', null=True, blank=True)
+    image = CompressedImageField(upload_to='products/images', null=True, blank=True,
+                                 variants=('thumbnail', 'card', 'detail'), variants_field='image_variants')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     product = models.ForeignKey(Product, on_delete=models.CASCADE,null=True,blank=True,related_name='images')
     class Meta:
         verbose_name_plural = 'Images'
@@ -39,8 +46,40 @@ class Image(BaseModel):
 
 class Banner(BaseModel):
     title = models.CharField(max_length=255)
-    image = CompressedImageField()
+    image = CompressedImageField(variants=('card', 'detail', 'banner'), variants_field='image_variants')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     sub_title = models.CharField(max_length=255)
 
     def __str__(self):
         return self.title
+
+
+class CatalogEntry(models.Model):
+    """
+    Read model of the catalog API: the JSON of one category (products and
+    images nested) or one product, per language, as the API renders it
+    but with site-relative media URLs. Kept up to date by the catalog
+    signals, see ``api.products.catalog``.
+    """
+
+    class Kind(models.TextChoices):
+        CATEGORY = "category", "Category"
+        PRODUCT = "product", "Product"
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    language = models.CharField(max_length=10)
+    object_id = models.PositiveBigIntegerField()
+    category_id = models.PositiveBigIntegerField(null=True, blank=True)
+    data = models.TextField()
+
+    class Meta:
+        verbose_name_plural = "Catalog entries"
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'language', 'object_id'], name='catalogentry_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'language', 'category_id', 'object_id'], name='catalogentry_category_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} ({self.language})"
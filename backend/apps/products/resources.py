@@ -0,0 +1,298 @@
+"""
+Import resources of the catalog admins, for price lists of tens of
+thousands of rows.
+
+Rows are matched on their ``id`` column, as exported, against existing
+rows loaded up front; rows without an id are new. Foreign keys are
+resolved with one query for the whole file and writes go out in batches,
+``bulk_create`` for new rows and an upsert on the primary key for
+existing ones.
+Bulk writes send no signals, so the read model, the search and suggest
+indexes and the response caches are refreshed once after the import.
+Image cells holding an http(s) URL are not downloaded during the import:
+the field is left empty and an ``ImageJob`` fetches and compresses the
+image in the process_images worker. Empty image cells change nothing.
+"""
+
+from collections import Counter
+from functools import partial
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import FileField
+from django.utils import timezone
+from import_export import resources, widgets
+from import_export.fields import Field
+from import_export.instance_loaders import ModelInstanceLoader
+
+from api.products import catalog
+from apps.utils import dedup
+from apps.utils.generations import bump
+from apps.utils.imagejobs import is_remote
+from apps.utils.models import ImageJob
+
+from .models import Banner, Category, Product
+from .search import get_search_index
+from .suggest import suggest_index
+
+
+def chunks(values, size):
+    values = iter(values)
+    while chunk := list(islice(values, size)):
+        yield chunk
+
+
+def lookup_key(value) -> str:
+    # Spreadsheets hand integer ids over as floats.
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+class PreloadedInstanceLoader(ModelInstanceLoader):
+    """
+    The existing rows of the whole dataset, fetched up front with one query
+    per ``batch_size`` keys and kept in a dict keyed on the resource's
+    (single) import id field. Rows without a key are new; a key that does
+    not exist, or that the file repeats, fails its row instead of creating
+    or overwriting a product nobody meant.
+    """
+
+    def __init__(self, resource, dataset=None):
+        super().__init__(resource, dataset)
+        [name] = resource.get_import_id_fields()
+        self.field = resource.fields[name]
+        self.instances = {}
+        self.repeated = set()
+        if dataset is None or self.field.column_name not in dataset.headers:
+            return
+        column = self.field.column_name
+        counts = Counter(self.key({column: value}) for value in dataset[column])
+        counts.pop(None, None)
+        counts.pop("", None)
+        self.repeated = {key for key, count in counts.items() if count > 1}
+        for chunk in chunks(counts, resource._meta.batch_size):
+            for instance in self.get_queryset().filter(**{f"{self.field.attribute}__in": chunk}):
+                self.instances[self.field.get_value(instance)] = instance
+
+    def key(self, row):
+        return self.field.clean(row)
+
+    def get_instance(self, row):
+        key = self.key(row)
+        if key in (None, ""):
+            return None
+        if key in self.repeated:
+            raise ValueError(f"{self.field.column_name} {key} appears more than once in the file.")
+        try:
+            return self.instances[key]
+        except KeyError:
+            model = self.resource._meta.model
+            raise model.DoesNotExist(f"{model._meta.object_name} {key} does not exist.") from None
+
+
+class PreloadedForeignKeyWidget(widgets.ForeignKeyWidget):
+    """``ForeignKeyWidget`` answering from the related rows ``load`` fetched for the whole file."""
+
+    def __init__(self, model, field="pk", **kwargs):
+        super().__init__(model, field, **kwargs)
+        self.objects = None
+
+    def load(self, values, batch_size):
+        self.objects = {}
+        keys = {lookup_key(value) for value in values if value not in (None, "")}
+        for chunk in chunks(keys, batch_size):
+            for obj in self.get_queryset(None, None).filter(**{f"{self.field}__in": chunk}):
+                self.objects[lookup_key(getattr(obj, self.field))] = obj
+
+    def clean(self, value, row=None, **kwargs):
+        if self.objects is None or self.use_natural_foreign_keys:
+            return super().clean(value, row, **kwargs)
+        if value in (None, ""):
+            return None
+        try:
+            obj = self.objects[lookup_key(value)]
+        except KeyError:
+            raise self.model.DoesNotExist(f"{self.model._meta.object_name} {value!r} does not exist.") from None
+        return obj.pk if self.key_is_id else obj
+
+
+class BulkCatalogResource(resources.ModelResource):
+    """
+    ``ModelResource`` writing in batches. Ids identify the rows to update
+    but are never written, new rows get theirs from the database; image
+    variants are derived data and not imported either.
+    """
+
+    id = Field(attribute="id", column_name="id", widget=widgets.IntegerWidget(), readonly=True)
+
+    class Meta:
+        use_bulk = True
+        batch_size = 1000
+        # Diffs copy and export every row twice, the preview shows row statuses only.
+        skip_diff = True
+        instance_loader_class = PreloadedInstanceLoader
+        # Rows per fetch of exports.
+        chunk_size = 2000
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Every instance created or updated, refreshed together after the import.
+        self.written = []
+        self.image_fields = {
+            field.name: field for field in self._meta.model._meta.fields if isinstance(field, FileField)
+        }
+        self.variants_fields = {field.variants_field for field in self.image_fields.values()} - {None}
+
+    @classmethod
+    def get_fk_widget(cls, field):
+        return partial(PreloadedForeignKeyWidget, model=field.remote_field.model)
+
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        for field in self.get_import_fields():
+            if isinstance(field.widget, PreloadedForeignKeyWidget) and field.column_name in dataset.headers:
+                field.widget.load(dataset[field.column_name], self._meta.batch_size)
+
+    def import_field(self, field, instance, row, is_m2m=False, **kwargs):
+        if field.attribute in self.variants_fields:
+            return
+        model_field = self.image_fields.get(field.attribute)
+        if model_field is None or field.column_name not in row:
+            return super().import_field(field, instance, row, is_m2m, **kwargs)
+        url = field.clean(row)
+        if not url:
+            # Price lists without pictures keep the images already there.
+            return
+        if not is_remote(url):
+            return super().import_field(field, instance, row, is_m2m, **kwargs)
+        if len(url) > ImageJob._meta.get_field("source").max_length:
+            raise ValueError("The image URL is too long.")
+        # Left empty until the process_images worker has fetched the image.
+        variants = getattr(instance, model_field.variants_field) if model_field.variants_field else None
+        replaced = dedup.image_files(getattr(instance, model_field.attname).name, variants)
+        setattr(instance, model_field.attname, "")
+        if model_field.variants_field:
+            setattr(instance, model_field.variants_field, {})
+        instance.__dict__.setdefault("_remote_images", {})[model_field.name] = url
+        instance.__dict__.setdefault("_replaced_images", {})[model_field.name] = replaced
+
+    def before_save_instance(self, instance, row, **kwargs):
+        super().before_save_instance(instance, row, **kwargs)
+        # bulk_update leaves auto_now fields alone.
+        instance.date_updated = timezone.now()
+
+    def get_bulk_update_fields(self):
+        # Resource fields name foreign keys by their column (``category_id``).
+        columns = {
+            name: field.name
+            for field in self._meta.model._meta.concrete_fields
+            if not field.primary_key and field.name != "date_created"
+            for name in (field.name, field.attname)
+        }
+        names = [field.attribute for field in self.get_import_fields() if not field.readonly]
+        return list(dict.fromkeys(columns[name] for name in [*names, "date_updated"] if name in columns))
+
+    def bulk_create(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        self.written.extend(self.create_instances)
+        super().bulk_create(using_transactions, dry_run, raise_errors, batch_size, result)
+
+    def bulk_update(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        # An upsert on the primary key instead of QuerySet.bulk_update, whose
+        # CASE per row and column takes longer to compile than to run.
+        self.written.extend(self.update_instances)
+        try:
+            if self.update_instances and (using_transactions or not dry_run):
+                self._meta.model.objects.bulk_create(
+                    self.update_instances,
+                    batch_size=batch_size,
+                    update_conflicts=True,
+                    unique_fields=[self._meta.model._meta.pk.name],
+                    update_fields=self.get_bulk_update_fields(),
+                )
+        except Exception as e:
+            self.handle_import_error(result, e, raise_errors)
+        finally:
+            self.update_instances.clear()
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if self._is_dry_run(kwargs) or result.has_errors() or not self.written:
+            return
+        using = self.get_db_connection_name()
+        self.queue_images(using)
+        self.refresh([instance.pk for instance in self.written], using)
+
+    def queue_images(self, using):
+        """One ``ImageJob`` per image URL, and a reference less to every image they replace."""
+        content_type = ContentType.objects.db_manager(using).get_for_model(self._meta.model)
+        jobs, replaced = [], {name: [] for name in self.image_fields}
+        for instance in self.written:
+            for name, url in instance.__dict__.pop("_remote_images", {}).items():
+                jobs.append(ImageJob(content_type=content_type, object_id=instance.pk, field_name=name, source=url))
+            for name, files in instance.__dict__.pop("_replaced_images", {}).items():
+                replaced[name].extend(files)
+        ImageJob.objects.using(using).bulk_create(jobs, batch_size=self._meta.batch_size)
+        for name, files in replaced.items():
+            for chunk in chunks(files, self._meta.batch_size):
+                dedup.release(self.image_fields[name].storage, chunk)
+
+    def refresh(self, pks, using):
+        """What the post_save signals of the written rows would have done."""
+        model = self._meta.model
+        bump(model)
+        transaction.on_commit(lambda: bump(model), using=using)
+
+
+def refresh_entries(using, categories=(), products=()):
+    """``catalog.schedule``, or a rebuild of the read model once per-id lookups get too long."""
+    if len(categories) + len(products) > BulkCatalogResource._meta.batch_size:
+        transaction.on_commit(lambda: catalog.rebuild(using), using=using)
+    else:
+        catalog.schedule(using, categories=categories, products=products)
+
+
+def refresh_search_index(using, pks):
+    """``update_many`` of the written products, or a rebuild of the index for more than a batch."""
+    index = get_search_index(using)
+    if len(pks) > BulkCatalogResource._meta.batch_size:
+        index.rebuild()
+    elif pks:
+        index.update_many(pks)
+
+
+class ProductResource(BulkCatalogResource):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Products moved to another category leave the old category's entry too.
+        self.previous_categories = set()
+
+    class Meta:
+        model = Product
+
+    def import_instance(self, instance, row, **kwargs):
+        if instance.pk is not None:
+            self.previous_categories.add(instance.category_id)
+        super().import_instance(instance, row, **kwargs)
+
+    def refresh(self, pks, using):
+        super().refresh(pks, using)
+        refresh_search_index(using, pks)
+        transaction.on_commit(suggest_index.invalidate, using=using)
+        refresh_entries(using, categories=self.previous_categories - {None}, products=pks)
+
+
+class CategoryResource(BulkCatalogResource):
+    class Meta:
+        model = Category
+
+    def refresh(self, pks, using):
+        super().refresh(pks, using)
+        transaction.on_commit(suggest_index.invalidate, using=using)
+        refresh_entries(using, categories=pks)
+
+
+class BannerResource(BulkCatalogResource):
+    class Meta:
+        model = Banner
@@ -0,0 +1,212 @@
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+from modeltranslation.utils import build_localized_fieldname
+
+from .models import Product
+
+SEARCH_FIELDS = ("name", "description")
+
+# Columns that make up a product's search document, names weighted above
+# descriptions: name_tk, name_en, name_ru, description_tk, ...
+COLUMNS = tuple(
+    build_localized_fieldname(field, lang)
+    for field in SEARCH_FIELDS
+    for lang, _ in settings.LANGUAGES
+)
+WEIGHTS = tuple(10.0 if column.startswith("name_") else 1.0 for column in COLUMNS)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """
+    Full-text index over the translated product columns.
+
+    ``search`` returns product ids, best match first; every term is matched as
+    a prefix so partial words typed in the search box already find products.
+    ``offset`` pages through the ranking (ties are ordered by id) and
+    ``within``, a ``Product`` queryset, restricts it to the products the
+    queryset selects.
+    """
+
+    table = "products_product_search"
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, text: str, limit: int, offset: int = 0, within=None) -> list[int]:
+        raise NotImplementedError
+
+    @staticmethod
+    def restrict(column, within) -> tuple[str, list]:
+        """SQL condition and params limiting ``column`` to the ids of ``within``."""
+        if within is None:
+            return "", []
+        within = within.order_by().values("pk")
+        sql, params = within.query.get_compiler(using=within.db).as_sql()
+        return f" AND {column} IN ({sql})", list(params)
+
+    def update(self, product: Product) -> None:
+        pass
+
+    def update_many(self, pks) -> None:
+        """``update`` of the products ``pks`` with two statements, for bulk writes."""
+        pass
+
+    def delete(self, pk: int) -> None:
+        pass
+
+    def rebuild(self) -> None:
+        pass
+
+    @staticmethod
+    def selected(column, pks) -> tuple[str, list]:
+        """``WHERE`` clause and params limiting ``column`` to ``pks``; none for ``None``."""
+        if pks is None:
+            return "", []
+        pks = list(pks)
+        return f" WHERE {column} IN ({', '.join(['%s'] * len(pks))})", pks
+
+
+class SqliteSearchIndex(SearchIndex):
+    """FTS5 virtual table keyed by the product id (its rowid)."""
+
+    def search(self, text, limit, offset=0, within=None):
+        terms = tokenize(text)
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"*' for term in terms)
+        weights = ", ".join(str(weight) for weight in WEIGHTS)
+        condition, params = self.restrict("rowid", within)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s{condition} "
+                f"ORDER BY bm25({self.table}, {weights}), rowid LIMIT %s OFFSET %s",
+                [match, *params, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def update(self, product):
+        values = [getattr(product, column) or "" for column in COLUMNS]
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [product.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {', '.join(COLUMNS)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(COLUMNS))})",
+                [product.pk, *values],
+            )
+
+    def delete(self, pk):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [pk])
+
+    def update_many(self, pks):
+        self.reindex(pks)
+
+    def rebuild(self):
+        self.reindex(None)
+
+    def reindex(self, pks):
+        columns = ", ".join(COLUMNS)
+        sources = ", ".join(f"COALESCE({column}, '')" for column in COLUMNS)
+        indexed, params = self.selected("rowid", pks)
+        source, _ = self.selected("id", pks)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}{indexed}", params)
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {columns}) "
+                f"SELECT id, {sources} FROM {Product._meta.db_table}{source}",
+                params,
+            )
+
+
+class PostgresSearchIndex(SearchIndex):
+    """``tsvector`` table with a GIN index, using the language-neutral ``simple`` config."""
+
+    @staticmethod
+    def document_sql(sources) -> str:
+        return " || ".join(
+            f"setweight(to_tsvector('simple', COALESCE({source}, '')), '{'A' if weight > 1 else 'D'}')"
+            for source, weight in zip(sources, WEIGHTS)
+        )
+
+    def search(self, text, limit, offset=0, within=None):
+        terms = tokenize(text)
+        if not terms:
+            return []
+        query = " & ".join(f"{term}:*" for term in terms)
+        condition, params = self.restrict("product_id", within)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT product_id FROM {self.table}, to_tsquery('simple', %s) query "
+                f"WHERE document @@ query{condition} "
+                f"ORDER BY ts_rank(document, query) DESC, product_id LIMIT %s OFFSET %s",
+                [query, *params, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def update(self, product):
+        document = self.document_sql(["%s::text"] * len(COLUMNS))
+        values = [getattr(product, column) or "" for column in COLUMNS]
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.table} (product_id, document) VALUES (%s, {document}) "
+                f"ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                [product.pk, *values],
+            )
+
+    def delete(self, pk):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE product_id = %s", [pk])
+
+    def update_many(self, pks):
+        self.reindex(pks)
+
+    def rebuild(self):
+        self.reindex(None)
+
+    def reindex(self, pks):
+        indexed, params = self.selected("product_id", pks)
+        source, _ = self.selected("id", pks)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}{indexed}", params)
+            cursor.execute(
+                f"INSERT INTO {self.table} (product_id, document) "
+                f"SELECT id, {self.document_sql(COLUMNS)} FROM {Product._meta.db_table}{source}",
+                params,
+            )
+
+
+class ScanSearchIndex(SearchIndex):
+    """Other databases: no index, ``icontains`` over every translated column."""
+
+    def search(self, text, limit, offset=0, within=None):
+        terms = tokenize(text)
+        if not terms:
+            return []
+        queryset = Product.objects.all() if within is None else within.order_by()
+        for term in terms:
+            condition = Q()
+            for column in COLUMNS:
+                condition |= Q(**{f"{column}__icontains": term})
+            queryset = queryset.filter(condition)
+        return list(queryset.order_by("pk").values_list("pk", flat=True)[offset:offset + limit])
+
+
+ENGINES = {
+    "sqlite": SqliteSearchIndex,
+    "postgresql": PostgresSearchIndex,
+}
+
+
+def get_search_index(using=None) -> SearchIndex:
+    using = using or router.db_for_read(Product)
+    connection = connections[using]
+    return ENGINES.get(connection.vendor, ScanSearchIndex)(connection)
@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from api.products import catalog
+from apps.utils.generations import bump
+
+from .models import Banner, Category, Image, Product
+from .search import get_search_index
+from .suggest import suggest_index
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        get_search_index(using).update(instance)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, using, **kwargs):
+    get_search_index(using).delete(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+def suggest_saved(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: suggest_index.update(instance), using=using)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def suggest_deleted(sender, instance, using, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: suggest_index.delete(sender, pk), using=using)
+
+
+@receiver(pre_save, sender=Product)
+def remember_category(sender, instance, using, raw=False, **kwargs):
+    # A product moved to another category leaves the old category's entry too.
+    if not raw and instance.pk is not None:
+        instance._previous_category_id = (
+            sender.objects.using(using).filter(pk=instance.pk).values_list("category_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_product_entries(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        previous = instance.__dict__.pop("_previous_category_id", None)
+        catalog.schedule(using, categories=[instance.category_id, previous], products=[instance.pk])
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def refresh_image_entries(sender, instance, using, raw=False, **kwargs):
+    if not raw and instance.product_id is not None:
+        catalog.schedule(using, products=[instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def refresh_category_entries(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        catalog.schedule(using, categories=[instance.pk])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Image)
+@receiver(post_delete, sender=Banner)
+def invalidate_catalog(sender, using, raw=False, **kwargs):
+    # Bumped again after commit so a response cached from another request
+    # between the write and the commit does not outlive the change.
+    bump(sender)
+    transaction.on_commit(lambda: bump(sender), using=using)
+
@@ -0,0 +1,140 @@
+import threading
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import get_language
+from modeltranslation.utils import build_localized_fieldname
+
+from .models import Category, Product
+from .search import tokenize
+
+GENERATION_KEY = "suggest:generation"
+
+KINDS = {Product: "products", Category: "categories"}
+
+
+def localized_names(instance) -> dict[str, str]:
+    """``{lang: name}`` with modeltranslation's fallback order applied."""
+    values = {
+        lang: getattr(instance, build_localized_fieldname("name", lang)) or ""
+        for lang, _ in settings.LANGUAGES
+    }
+    fallbacks = [values[lang] for lang in settings.MODELTRANSLATION_FALLBACK_LANGUAGES if values.get(lang)]
+    return {lang: value or (fallbacks[0] if fallbacks else "") for lang, value in values.items()}
+
+
+class PrefixIndex:
+    """
+    In-process type-ahead index over product and category names.
+
+    Every word of every name is kept per language in a sorted list of
+    ``(word, kind, pk)`` tuples, so a prefix lookup is a bisect followed by a
+    short scan. Saves and deletes in this process patch the lists in place;
+    the cache holds a generation number that other processes bump, and a
+    stale index is reloaded from the database on the next lookup.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.words = {}
+        self.names = {}
+
+    def load(self):
+        words = {lang: [] for lang, _ in settings.LANGUAGES}
+        names = {}
+        fields = ["pk"] + [build_localized_fieldname("name", lang) for lang, _ in settings.LANGUAGES]
+        for model, kind in KINDS.items():
+            for instance in model.objects.only(*fields):
+                for lang, name in localized_names(instance).items():
+                    names[lang, kind, instance.pk] = name
+                    words[lang].extend((word, kind, instance.pk) for word in set(tokenize(name)))
+        for entries in words.values():
+            entries.sort()
+        return words, names
+
+    def ensure_fresh(self):
+        generation = cache.get(GENERATION_KEY, 0)
+        if generation == self.generation:
+            return
+        words, names = self.load()
+        with self.lock:
+            self.words, self.names, self.generation = words, names, generation
+
+    def _remove(self, kind, pk):
+        for lang, entries in self.words.items():
+            name = self.names.pop((lang, kind, pk), None)
+            if name is None:
+                continue
+            for word in set(tokenize(name)):
+                position = bisect_left(entries, (word, kind, pk))
+                if position < len(entries) and entries[position] == (word, kind, pk):
+                    del entries[position]
+
+    def update(self, instance):
+        kind = KINDS[type(instance)]
+        with self.lock:
+            self._remove(kind, instance.pk)
+            for lang, name in localized_names(instance).items():
+                self.names[lang, kind, instance.pk] = name
+                for word in set(tokenize(name)):
+                    insort(self.words.setdefault(lang, []), (word, kind, instance.pk))
+            self._bump()
+
+    def delete(self, model, pk):
+        with self.lock:
+            self._remove(KINDS[model], pk)
+            self._bump()
+
+    def invalidate(self):
+        """After bulk writes that sent no signals: every process, this one too, reloads."""
+        with self.lock:
+            self.generation = None
+            self._bump()
+
+    def _bump(self):
+        try:
+            generation = cache.incr(GENERATION_KEY)
+        except ValueError:
+            generation = 1
+            cache.set(GENERATION_KEY, generation, timeout=None)
+        # Only adopt the new generation if nobody else changed the catalog
+        # since this index was loaded, otherwise reload on the next lookup.
+        if self.generation is not None and generation == self.generation + 1:
+            self.generation = generation
+
+    def suggest(self, query: str, limit: int = 10, lang: str | None = None) -> dict[str, list]:
+        result = {kind: [] for kind in KINDS.values()}
+        terms = tokenize(query)
+        if not terms:
+            return result
+        self.ensure_fresh()
+
+        lang = lang or get_language()
+        if lang not in self.words:
+            lang = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+        *leading, last = terms
+
+        with self.lock:
+            entries = self.words[lang]
+            position = bisect_left(entries, (last,))
+            seen = set()
+            while position < len(entries) and entries[position][0].startswith(last):
+                _, kind, pk = entries[position]
+                position += 1
+                if (kind, pk) in seen or len(result[kind]) >= limit:
+                    if all(len(found) >= limit for found in result.values()):
+                        break
+                    continue
+                seen.add((kind, pk))
+                name = self.names[lang, kind, pk]
+                if leading:
+                    words = tokenize(name)
+                    if not all(any(word.startswith(term) for word in words) for term in leading):
+                        continue
+                result[kind].append({"id": pk, "name": name})
+        return result
+
+
+suggest_index = PrefixIndex()
@@ -1,3 +1,1079 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone, translation
+from django.utils.translation import gettext_lazy
+from PIL import Image as PilImage
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from tablib import Dataset
+
+from api.products import catalog, compact, renderers, snapshot
+from api.products.filters import FullTextSearchFilter
+from api.products.serializers import BannerSerializer, CategorySerializer, ImageSerializer, ProductSerializer
+from apps.products.models import Banner, CatalogEntry, Category, Image, Product
+from apps.products.resources import BulkCatalogResource, ProductResource
+from apps.products.search import get_search_index
+from apps.utils import dedup, exports, imagejobs
+from apps.utils.fields import CompressedImageSpec
+from apps.utils.models import ImageJob, StoredFile
+from apps.utils.testing import QueryCountMixin
+
+
+def make_catalog(categories=2, products=3, images=2):
+    # Run the on-commit catalog hooks, so the read model is up to date too.
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        _make_catalog(categories, products, images)
+
+
+def _make_catalog(categories, products, images):
+    for c in range(categories):
+        category = Category.objects.create(name=f"Category {c}", description="")
+        for p in range(products):
+            product = Product.objects.create(
+                category=category,
+                name=f"Product {c}-{p}",
+                price=10 + p,
+                image=f"product/{c}-{p}.webp",
+                description="",
+            )
+            Image.objects.bulk_create(
+                Image(product=product, image=f"products/images/{c}-{p}-{i}.webp")
+                for i in range(images)
+            )
+    Banner.objects.create(title="Banner", sub_title="", image=f"banner/{Banner.objects.count()}.webp")
+
+
+def make_upload(width=1200, height=800, name="photo.jpg"):
+    output = BytesIO()
+    PilImage.new("RGB", (width, height), "red").save(output, format="JPEG")
+    return SimpleUploadedFile(name, output.getvalue(), content_type="image/jpeg")
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class CatalogQueryCountTests(QueryCountMixin, TestCase):
+    # ?format=json is not a read model filter: the serializers render these.
+    # Every list and detail also runs one aggregate for its validators.
+    def setUp(self):
+        make_catalog()
+
+    def test_categories(self):
+        response = self.assertConstantQueries("/api/v1/gyrat/categories/?format=json", make_catalog, num=4)
+        products = response.json()[0]["products"]
+        self.assertEqual(len(products), 3)
+        self.assertEqual(len(products[0]["images"]), 2)
+
+    def test_products(self):
+        self.assertConstantQueries("/api/v1/gyrat/products/?format=json", make_catalog, num=3)
+
+    def test_product_detail(self):
+        product = Product.objects.first()
+        self.assertConstantQueries(f"/api/v1/gyrat/products/{product.pk}/?format=json", make_catalog, num=3)
+
+    def test_banners(self):
+        self.assertConstantQueries("/api/v1/gyrat/banners/", make_catalog, num=2)
+
+    def test_read_model(self):
+        product = Product.objects.first()
+        for path in ("/api/v1/gyrat/categories/", "/api/v1/gyrat/products/", f"/api/v1/gyrat/products/{product.pk}/"):
+            with self.subTest(path=path):
+                self.assertConstantQueries(path, make_catalog, num=2)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["responses"].clear()
+        make_catalog()
+
+    def test_repeated_reads_skip_the_database(self):
+        first = self.client.get("/api/v1/gyrat/categories/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/v1/gyrat/categories/")
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second["Content-Type"], "application/json")
+
+    def test_keyed_on_query_and_language(self):
+        self.client.get("/api/v1/gyrat/products/")
+        with self.assertNumQueries(3):
+            self.client.get("/api/v1/gyrat/products/", {"page_size": 2})
+        with self.assertNumQueries(2):
+            self.client.get("/api/v1/gyrat/products/", HTTP_ACCEPT_LANGUAGE="ru")
+
+    def test_keyed_on_the_parameters_the_view_reads(self):
+        category = Category.objects.first().pk
+        self.client.get(f"/api/v1/gyrat/products/?category={category}&page_size=2")
+        with self.assertNumQueries(0):
+            self.client.get(f"/api/v1/gyrat/products/?page_size=2&category={category}")
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get("/api/v1/gyrat/products/", {"page_size": 2, "utm_source": "x"})
+            self.assertGreater(len(queries), 0)
+
+    def test_responses_have_their_own_cache(self):
+        self.client.get("/api/v1/gyrat/banners/")
+        caches["responses"].clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/v1/gyrat/banners/")
+        self.assertGreater(len(queries), 0)
+        with self.assertNumQueries(0):
+            self.client.get("/api/v1/gyrat/banners/")
+
+    def test_writes_invalidate_dependent_endpoints_only(self):
+        self.client.get("/api/v1/gyrat/categories/")
+        self.client.get("/api/v1/gyrat/banners/")
+
+        image = Image.objects.first()
+        image.image = "products/images/new.webp"
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save()
+
+        body = self.client.get("/api/v1/gyrat/categories/").json()
+        self.assertIn("http://testserver/media/products/images/new.webp", str(body))
+        with self.assertNumQueries(0):
+            self.client.get("/api/v1/gyrat/banners/")
+
+
+class CatalogReadModelTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_catalog()
+
+    def get(self, path, lang="tk", **params):
+        # ?format=json is not a read model filter: rendered by the serializers.
+        served = self.client.get(path, params, HTTP_ACCEPT_LANGUAGE=lang)
+        rendered = self.client.get(path, {**params, "format": "json"}, HTTP_ACCEPT_LANGUAGE=lang)
+        return served.json(), rendered.json()
+
+    def test_same_output_as_serializers(self):
+        Product.objects.filter(pk=1).update(name_ru="Товар")
+        call_command("rebuild_catalog_entries", stdout=StringIO())
+        for lang in ("tk", "ru"):
+            with self.subTest(lang=lang), translation.override(lang):
+                served, rendered = self.get("/api/v1/gyrat/categories/", lang=lang)
+                self.assertEqual(served, rendered)
+        served, rendered = self.get("/api/v1/gyrat/products/", category=Category.objects.first().pk)
+        self.assertEqual(sorted(served, key=lambda p: p["id"]), sorted(rendered, key=lambda p: p["id"]))
+        product = Product.objects.first()
+        self.assertEqual(*self.get(f"/api/v1/gyrat/products/{product.pk}/"))
+
+    def test_one_table_scan(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/v1/gyrat/categories/")
+        [query] = [query["sql"] for query in queries if "catalogentry" in query["sql"]]
+        self.assertNotIn("JOIN", query)
+
+    def test_refreshed_on_write(self):
+        first, second = Category.objects.all()
+        product = first.products.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = "Moved"
+            product.category = second
+            product.save()
+            product.images.first().delete()
+
+        categories = {c["id"]: c for c in self.client.get("/api/v1/gyrat/categories/").json()}
+        self.assertNotIn(product.pk, [p["id"] for p in categories[first.pk]["products"]])
+        [moved] = [p for p in categories[second.pk]["products"] if p["id"] == product.pk]
+        self.assertEqual((moved["name"], len(moved["images"])), ("Moved", 1))
+
+        deleted = first.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual([c["id"] for c in self.client.get("/api/v1/gyrat/categories/").json()], [second.pk])
+        self.assertFalse(CatalogEntry.objects.filter(category_id=deleted).exists())
+
+    def test_missing_entry_falls_back_to_the_database(self):
+        product = Product.objects.first()
+        CatalogEntry.objects.filter(kind=CatalogEntry.Kind.PRODUCT, object_id=product.pk).delete()
+        with CaptureQueriesContext(connection) as queries:
+            served, rendered = self.get(f"/api/v1/gyrat/products/{product.pk}/")
+        self.assertEqual(served, rendered)
+        self.assertIn('SELECT "products_product"', "\n".join(query["sql"] for query in queries))
+
+    def test_refreshed_on_commit(self):
+        product = Product.objects.first()
+        with self.captureOnCommitCallbacks() as callbacks:
+            product.name = "Renamed"
+            product.save()
+            # Until the commit the entry still holds what was committed before.
+            self.assertNotEqual(self.client.get(f"/api/v1/gyrat/products/{product.pk}/").json()["name"], "Renamed")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(f"/api/v1/gyrat/products/{product.pk}/").json()["name"], "Renamed")
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_catalog()
+
+    def get(self, path, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, params)
+        # Row loads only, not the conditional GET aggregate.
+        return response, [query["sql"] for query in queries if "MAX(" not in query["sql"]]
+
+    def test_fields_prune_output_and_columns(self):
+        response, queries = self.get("/api/v1/gyrat/products/", fields="id,name,price")
+        self.assertEqual(set(response.json()[0]), {"id", "name", "price"})
+        [select] = [sql for sql in queries if 'FROM "products_product"' in sql]
+        self.assertNotIn("description", select)
+        self.assertFalse([sql for sql in queries if "products_image" in sql])
+
+    def test_nested_fields_and_expand(self):
+        response, queries = self.get(
+            "/api/v1/gyrat/products/", fields="id,images.image,category.name", expand="category",
+        )
+        product = response.json()[0]
+        self.assertEqual(set(product), {"id", "images", "category"})
+        self.assertEqual(set(product["images"][0]), {"image"})
+        self.assertEqual(set(product["category"]), {"name"})
+        [select] = [sql for sql in queries if 'FROM "products_product"' in sql]
+        self.assertIn('JOIN "products_category"', select)
+        [images] = [sql for sql in queries if 'FROM "products_image"' in sql]
+        self.assertNotIn("image_variants", images)
+
+    def test_categories_without_products_skip_the_prefetch(self):
+        response, queries = self.get("/api/v1/gyrat/categories/", fields="id,name", page_size=1)
+        self.assertEqual(set(response.json()["results"][0]), {"id", "name"})
+        self.assertFalse([sql for sql in queries if "products_product" in sql])
+
+    def test_unknown_fields_are_rejected(self):
+        for params in ({"fields": "nope"}, {"expand": "name"}, {"fields": "name.first"}):
+            with self.subTest(**params):
+                self.assertEqual(self.client.get("/api/v1/gyrat/banners/", params).status_code, 400)
+
+
+class AsyncCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_catalog()
+
+    async def get(self, path, lang, **params):
+        return await self.async_client.get(f"/api/v1/gyrat/{path}", params, headers={"accept-language": lang})
+
+    async def test_same_output_as_sync_endpoints(self):
+        category = await Category.objects.afirst()
+        product = await Product.objects.afirst()
+        paths = [
+            ("categories/", {}),
+            (f"categories/{category.pk}/", {}),
+            ("products/", {}),
+            ("products/", {"category": category.pk}),
+            (f"products/{product.pk}/", {}),
+            ("banners/", {}),
+        ]
+        for lang in ("tk", "ru"):
+            for path, params in paths:
+                with self.subTest(lang=lang, path=path, **params):
+                    response = await self.get(f"async/{path}", lang, **params)
+                    expected = await self.get(path, lang, **params)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response["Content-Type"], "application/json")
+                    self.assertEqual(response.json(), expected.json())
+
+    async def test_errors(self):
+        self.assertEqual((await self.get("async/products/0/", "tk")).status_code, 404)
+        self.assertEqual((await self.get("async/products/", "tk", search="x")).status_code, 400)
+        response = await self.async_client.post("/api/v1/gyrat/async/categories/")
+        self.assertEqual(response.status_code, 405)
+
+
+class StreamingListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_catalog(categories=2, products=3)
+
+    def stream(self, path, **params):
+        response = self.client.get(path, {"stream": "1", **params})
+        self.assertTrue(response.streaming)
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_same_output_as_list(self):
+        for path, params in (
+            ("/api/v1/gyrat/products/", {}),
+            ("/api/v1/gyrat/products/", {"fields": "id,name", "category": Category.objects.first().pk}),
+            ("/api/v1/gyrat/categories/", {}),
+        ):
+            with self.subTest(path=path, **params):
+                expected = self.client.get(path, {"format": "json", **params}).json()
+                self.assertEqual(self.stream(path, **params), expected)
+        self.assertEqual(self.stream("/api/v1/gyrat/products/", search="nothing matches"), [])
+
+    def test_prefetched_per_chunk(self):
+        with mock.patch("api.products.viewsets.ProductViewSet.stream_chunk_size", 2):
+            with CaptureQueriesContext(connection) as queries:
+                products = self.stream("/api/v1/gyrat/products/")
+        self.assertEqual(len(products), 6)
+        self.assertEqual(len([query for query in queries if query["sql"].startswith('SELECT "products_image"')]), 3)
+
+    def test_not_cached(self):
+        self.stream("/api/v1/gyrat/products/")
+        self.assertTrue(self.client.get("/api/v1/gyrat/products/", {"stream": "1"}).streaming)
+
+
+class CatalogSnapshotTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        make_catalog()
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(CATALOG_SNAPSHOT_ROOT=self.root, CATALOG_SNAPSHOT_BASE_URL="http://testserver")
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def build(self, **options):
+        call_command("build_catalog_snapshot", stdout=StringIO(), **options)
+        return json.loads((self.root / "manifest.json").read_text())
+
+    def test_files_match_the_api(self):
+        manifest = self.build()
+        for lang in ("tk", "en", "ru"):
+            for name in ("categories", "products", "banners"):
+                path = self.root / "current" / lang / f"{name}.json"
+                self.assertEqual(manifest["files"][lang][name]["path"], f"{manifest['version']}/{lang}/{name}.json")
+                content = path.read_bytes()
+                self.assertEqual(gzip.decompress((path.parent / f"{name}.json.gz").read_bytes()), content)
+                response = self.client.get(f"/api/v1/gyrat/{name}/", HTTP_ACCEPT_LANGUAGE=lang)
+                self.assertEqual(json.loads(content), response.json())
+
+    def test_versions_follow_content(self):
+        first = self.build()
+        self.assertEqual(self.build(), first)
+        Banner.objects.create(title="New", sub_title="", image="banner/new.webp")
+        second = self.build(keep=1)
+        self.assertNotEqual(second["version"], first["version"])
+        self.assertEqual(os.readlink(self.root / "current"), second["version"])
+        self.assertFalse((self.root / first["version"]).exists())
+        self.assertEqual([path.name for path in self.root.iterdir() if path.name.startswith(".")], [])
+
+    def test_admin_save_marks_stale(self):
+        published = snapshot.generations()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/admin/products/banner/add/", {
+                "title": "Sale", "title_tk": "Sale", "sub_title": "Now", "sub_title_tk": "Now",
+                "image": make_upload(),
+            })
+        self.assertEqual(response.status_code, 302)
+        # Left to the watcher: nothing is built during the request.
+        self.assertFalse((self.root / "manifest.json").exists())
+        self.assertNotEqual(snapshot.generations(), published)
+        self.build()
+        banners = json.loads((self.root / "current" / "tk" / "banners.json").read_text())
+        self.assertIn("Sale", [banner["title"] for banner in banners])
+
+    def test_image_swap_marks_stale(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            banner = Banner.objects.create(title="Sale", sub_title="", image=make_upload())
+        self.build()
+        original = banner.image.name
+        self.assertIn(original, (self.root / "current" / "tk" / "banners.json").read_text())
+
+        published = snapshot.generations()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("process_images", once=True, workers=1, stdout=StringIO())
+        self.assertNotEqual(snapshot.generations(), published)
+        self.build()
+        banner.refresh_from_db()
+        published = (self.root / "current" / "tk" / "banners.json").read_text()
+        self.assertNotIn(original, published)
+        self.assertIn(banner.image.name, published)
+
+    def test_debounce(self):
+        debounce = snapshot.Debounce(quiet=10, max_delay=60)
+        self.assertFalse(debounce.due((1,), now=0))
+        self.assertTrue(debounce.due((1,), now=10))
+        debounce.built((1,))
+        self.assertFalse(debounce.due((1,), now=11))
+        # Changes every few seconds still publish once max_delay has passed.
+        for now, generation in ((20, 2), (25, 3), (30, 4), (75, 13)):
+            self.assertFalse(debounce.due((generation,), now=now))
+        self.assertTrue(debounce.due((14,), now=80))
+
+
+class LocalizedQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_catalog(categories=1, products=2)
+        self.first, self.second = Product.objects.order_by("id")
+        Product.objects.filter(pk=self.first.pk).update(name_ru="Товар", name_en="Product")
+        Product.objects.filter(pk=self.second.pk).update(name_tk="", name_en="Second", name_ru="")
+
+    def get(self, lang, **params):
+        # ?format=json skips the read model, the serializers do the work.
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/gyrat/products/", {"format": "json", **params}, HTTP_ACCEPT_LANGUAGE=lang)
+        [select] = [query["sql"] for query in queries if query["sql"].startswith('SELECT "products_product"')]
+        return {product["id"]: product for product in response.json()}, select
+
+    def test_fallbacks_resolved_in_sql(self):
+        for lang, names in {
+            "ru": ("Товар", "Second"),
+            "en": ("Product", "Second"),
+            "tk": (self.first.name_tk, "Second"),
+        }.items():
+            with self.subTest(lang=lang):
+                products, select = self.get(lang)
+                self.assertEqual((products[self.first.pk]["name"], products[self.second.pk]["name"]), names)
+                self.assertIn(f'COALESCE(NULLIF("products_product"."name_{lang}"', select)
+
+    def test_other_languages_not_loaded(self):
+        _, select = self.get("ru")
+        columns = select.split(" FROM ")[0]
+        self.assertNotIn('"products_product"."name",', columns)
+        # Only read inside the COALESCE, never loaded as a column of its own.
+        self.assertEqual(columns.count('"products_product"."description_en"'), 1)
+
+    def test_unhashable_fallback_value(self):
+        class Unhashable(str):
+            __hash__ = None
+
+        Product.objects.filter(pk=self.second.pk).update(name_en="")
+        with mock.patch.object(Product.name, "fallback_value", Unhashable("Unnamed")):
+            products, _ = self.get("ru")
+        self.assertEqual(products[self.second.pk]["name"], "Unnamed")
+
+    def test_same_output_as_model_descriptors(self):
+        products, _ = self.get("ru", fields="id,name,description")
+        with translation.override("ru"):
+            expected = {product.pk: (product.name, product.description) for product in Product.objects.all()}
+        self.assertEqual({pk: (p["name"], p["description"]) for pk, p in products.items()}, expected)
+
+
+class CompactSerializerParityTests(TestCase):
+    serializers = [
+        (Category, CategorySerializer, compact.CompactCategorySerializer),
+        (Product, ProductSerializer, compact.CompactProductSerializer),
+        (Image, ImageSerializer, compact.CompactImageSerializer),
+        (Banner, BannerSerializer, compact.CompactBannerSerializer),
+    ]
+
+    def setUp(self):
+        make_catalog(categories=2, products=2, images=2)
+        first, second = Product.objects.order_by("id")[:2]
+        Product.objects.filter(pk=first.pk).update(
+            name_ru="Товар", description_en="Described", image="product/with space & ünïcode.webp",
+            image_variants={
+                "card": {"width": 640, "height": 480, "files": {"avif": "product/c.avif", "webp": "product/c.webp"}},
+                "thumbnail": {"width": 160, "height": 120, "files": {"webp": "product/t.webp"}},
+            },
+        )
+        Product.objects.filter(pk=second.pk).update(name_tk="", name_en="", category=None, price=12.345)
+        Product.objects.create(name="Bare", price=1, image="", description="")
+        Image.objects.filter(pk=Image.objects.first().pk).update(image=None)
+        Banner.objects.update(title_ru="Баннер", sub_title_en="Sub")
+        Category.objects.create(name="Empty", description="")
+
+    def assertSameOutput(self, context):
+        for lang in ("tk", "en", "ru"):
+            for model, serializer_class, compact_class in self.serializers:
+                with self.subTest(lang=lang, serializer=serializer_class.__name__), translation.override(lang):
+                    expected = serializer_class(model.objects.order_by("id"), many=True, context=context).data
+                    data = compact_class(context=context).data(model.objects.order_by("id"))
+                    self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(expected))
+
+    def test_absolute_urls(self):
+        self.assertSameOutput({"request": RequestFactory().get("/", HTTP_HOST="shop.example")})
+
+    def test_relative_urls(self):
+        self.assertSameOutput({})
+
+    def test_catalog_marker(self):
+        self.assertSameOutput({"request": catalog.MarkerRequest()})
+
+    def test_fixed_query_count(self):
+        with self.assertNumQueries(3):
+            compact.CompactCategorySerializer().data(Category.objects.all())
+
+    def test_list_endpoints(self):
+        for path, serializer_class in (("categories", CategorySerializer), ("banners", BannerSerializer)):
+            with self.subTest(path=path):
+                response = self.client.get(f"/api/v1/gyrat/{path}/", {"format": "json"})
+                request = response.wsgi_request
+                model = serializer_class.Meta.model
+                expected = serializer_class(model.objects.all(), many=True, context={"request": request}).data
+                self.assertEqual(response.content, JSONRenderer().render(expected))
+
+
+class FastJSONTests(TestCase):
+    data = {
+        "id": 1,
+        "price": Decimal("10.50"),
+        "created": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        "day": date(2024, 5, 1),
+        "label": gettext_lazy("Products"),
+        "name": "Haryt \u2028 Товар",
+        "sizes": {480: [1, 2.5, None, True]},
+        "tags": ("a", "b"),
+    }
+
+    def assertSameAsJSONRenderer(self, data, media_type=None, context=None):
+        expected = JSONRenderer().render(data, media_type, context)
+        self.assertEqual(renderers.FastJSONRenderer().render(data, media_type, context), expected)
+
+    def test_same_output_as_json_renderer(self):
+        self.assertSameAsJSONRenderer(self.data)
+        self.assertSameAsJSONRenderer([self.data, {"big": 2 ** 70}])
+        self.assertSameAsJSONRenderer(self.data, "application/json; indent=2")
+        self.assertSameAsJSONRenderer(self.data, context={"indent": 4})
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertSameAsJSONRenderer(self.data)
+
+    def test_api_responses(self):
+        make_catalog()
+        response = self.client.get("/api/v1/gyrat/products/", {"format": "json"})
+        self.assertEqual(response.content, JSONRenderer().render(response.json()))
+
+    def test_parser(self):
+        parser = renderers.FastJSONParser()
+        self.assertEqual(parser.parse(BytesIO('{"name": "Товар", "n": [1.5]}'.encode())), {"name": "Товар", "n": [1.5]})
+        for content in (b"{", b'{"n": NaN}', b"\xff"):
+            with self.subTest(content=content), self.assertRaises(ParseError):
+                parser.parse(BytesIO(content))
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(parser.parse(BytesIO(b'{"a": 1}')), {"a": 1})
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_catalog()
+
+    def test_not_modified_with_one_aggregate_query(self):
+        etag = self.client.get("/api/v1/gyrat/categories/")["ETag"]
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/gyrat/categories/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get("/api/v1/gyrat/banners/")["Last-Modified"]
+        response = self.client.get("/api/v1/gyrat/banners/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_with_dependencies_and_deletes(self):
+        categories = self.client.get("/api/v1/gyrat/categories/")["ETag"]
+        products = self.client.get("/api/v1/gyrat/products/")["ETag"]
+
+        image = Image.objects.first()
+        image.image = "products/images/new.webp"
+        image.save()
+        response = self.client.get("/api/v1/gyrat/categories/", HTTP_IF_NONE_MATCH=categories)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], categories)
+
+        Product.objects.order_by("date_updated").first().delete()
+        response = self.client.get("/api/v1/gyrat/products/", HTTP_IF_NONE_MATCH=products)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], products)
+
+    def test_scoped_to_language_and_filters(self):
+        etag = self.client.get("/api/v1/gyrat/products/")["ETag"]
+        other = self.client.get("/api/v1/gyrat/products/", HTTP_ACCEPT_LANGUAGE="ru")["ETag"]
+        filtered = self.client.get("/api/v1/gyrat/products/", {"category": Category.objects.first().pk})["ETag"]
+        self.assertEqual(len({etag, other, filtered}), 3)
+
+    def test_search_runs_once(self):
+        caches["responses"].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/gyrat/products/", {"search": "product"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([query for query in queries if "MATCH" in query["sql"]]), 1)
+
+    def test_detail(self):
+        product = Product.objects.first()
+        etag = self.client.get(f"/api/v1/gyrat/products/{product.pk}/")["ETag"]
+        response = self.client.get(f"/api/v1/gyrat/products/{product.pk}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalid_detail_key_is_not_found(self):
+        for path in ("products", "categories", "banners"):
+            self.assertEqual(self.client.get(f"/api/v1/gyrat/{path}/abc/").status_code, 404)
+
+
+class KeysetPaginationTests(QueryCountMixin, TestCase):
+    def setUp(self):
+        make_catalog(categories=2, products=10, images=1)
+
+    def test_pages_cover_catalog_once(self):
+        url, seen = "/api/v1/gyrat/products/?page_size=7", []
+        while url:
+            body = self.client.get(url).json()
+            seen += [product["id"] for product in body["results"]]
+            url = body["next"]
+        self.assertEqual(len(seen), 20)
+        self.assertEqual(set(seen), set(Product.objects.values_list("id", flat=True)))
+
+    def test_page_queries_constant(self):
+        self.assertConstantQueries("/api/v1/gyrat/products/?page_size=5", make_catalog, num=3)
+
+    def test_unpaginated_by_default(self):
+        self.assertIsInstance(self.client.get("/api/v1/gyrat/products/").json(), list)
+
+    def test_nested_category_products(self):
+        body = self.assertConstantQueries("/api/v1/gyrat/categories/?page_size=5", make_catalog, num=4).json()
+        small, large = body["results"][0], body["results"][-1]
+        self.assertEqual(len(small["products"]["results"]), 3)
+        self.assertIsNone(small["products"]["next"])
+
+        products = large["products"]
+        self.assertEqual(len(products["results"]), 8)
+
+        rest = self.client.get(products["next"]).json()
+        self.assertEqual(len(rest["results"]), 2)
+        self.assertIsNone(rest["next"])
+        ids = {p["id"] for p in products["results"] + rest["results"]}
+        self.assertEqual(ids, set(Product.objects.filter(category=large["id"]).values_list("id", flat=True)))
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/v1/gyrat/products/?cursor=nope").status_code, 404)
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Eşikler", description="")
+        self.shirt = Product.objects.create(
+            category=category, name_tk="Ýüpek köýnek", name_en="Silk shirt", name_ru="Шёлковая рубашка",
+            price=100, image="product/1.webp", description_tk="", description_en="Light summer shirt",
+        )
+        self.shoes = Product.objects.create(
+            category=category, name_tk="Aýakgap", name_en="Shoes", name_ru="Туфли",
+            price=50, image="product/2.webp", description_tk="", description_en="Goes with a silk shirt",
+        )
+
+    def search(self, query):
+        return [p["id"] for p in self.client.get("/api/v1/gyrat/products/", {"search": query}).json()]
+
+    def test_prefix_match_in_every_language(self):
+        self.assertEqual(self.search("köý"), [self.shirt.pk])
+        self.assertEqual(self.search("руба"), [self.shirt.pk])
+        self.assertCountEqual(self.search("sh"), [self.shirt.pk, self.shoes.pk])
+
+    def test_name_ranks_above_description(self):
+        self.assertEqual(self.search("silk"), [self.shirt.pk, self.shoes.pk])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.shoes.name_en = "Boots"
+        self.shoes.description_en = ""
+        self.shoes.save()
+        self.assertEqual(self.search("boo"), [self.shoes.pk])
+        self.assertEqual(self.search("shoes"), [])
+
+        self.shirt.delete()
+        self.assertEqual(self.search("silk"), [])
+
+    def test_rebuild(self):
+        Product.objects.filter(pk=self.shoes.pk).update(name_en="Sandals")
+        get_search_index().rebuild()
+        self.assertEqual(self.search("sand"), [self.shoes.pk])
+
+    def pages(self, **params):
+        url, pages = "/api/v1/gyrat/products/", []
+        body = self.client.get(url, {"page_size": 1, **params}).json()
+        pages.append([p["id"] for p in body["results"]])
+        while body["next"]:
+            body = self.client.get(body["next"]).json()
+            pages.append([p["id"] for p in body["results"]])
+        return pages
+
+    @mock.patch.object(FullTextSearchFilter, "max_results", 1)
+    def test_unpaginated_results_are_capped(self):
+        self.assertEqual(self.search("silk"), [self.shirt.pk])
+
+    @mock.patch.object(FullTextSearchFilter, "max_results", 1)
+    def test_pages_cover_every_match_in_rank_order(self):
+        self.assertEqual(self.pages(search="silk"), [[self.shirt.pk], [self.shoes.pk]])
+
+    def test_pages_follow_other_filters(self):
+        other = Category.objects.create(name="Other", description="")
+        silk = [
+            Product.objects.create(category=other, name_en=f"Silk scarf {i}", price=1, image="", description="")
+            for i in range(3)
+        ]
+        self.assertEqual(self.pages(search="silk", category=other.pk), [[product.pk] for product in silk])
+        self.assertEqual(self.pages(search="silk", category=other.pk, page_size=5), [[product.pk for product in silk]])
+        self.assertEqual(
+            self.client.get("/api/v1/gyrat/products/", {"search": "silk", "cursor": "nope"}).status_code, 404,
+        )
+
+
+class SuggestTests(TestCase):
+    url = "/api/v1/gyrat/products/suggest/"
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name_tk="Köýnekler", name_en="Shirts", description="")
+            self.shirt = Product.objects.create(
+                category=self.category, name_tk="Ýüpek köýnek", name_en="Silk shirt",
+                price=100, image="product/1.webp", description="",
+            )
+
+    def suggest(self, q, lang="tk"):
+        return self.client.get(self.url, {"q": q}, HTTP_ACCEPT_LANGUAGE=lang).json()
+
+    def test_suggest_products_and_categories(self):
+        self.assertEqual(self.suggest("köý"), {
+            "products": [{"id": self.shirt.pk, "name": "Ýüpek köýnek"}],
+            "categories": [{"id": self.category.pk, "name": "Köýnekler"}],
+        })
+        self.assertEqual(self.suggest("silk sh", lang="en")["products"], [{"id": self.shirt.pk, "name": "Silk shirt"}])
+        self.assertEqual(self.suggest("silk x", lang="en")["products"], [])
+
+    def test_falls_back_to_default_language(self):
+        self.assertEqual(self.suggest("ýüp", lang="ru")["products"], [{"id": self.shirt.pk, "name": "Ýüpek köýnek"}])
+
+    def test_follows_saves_and_deletes(self):
+        self.suggest("x")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shirt.name_en = "Linen shirt"
+            self.shirt.save()
+        self.assertEqual(self.suggest("lin", lang="en")["products"], [{"id": self.shirt.pk, "name": "Linen shirt"}])
+        self.assertEqual(self.suggest("silk", lang="en")["products"], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        self.assertEqual(self.suggest("sh", lang="en"), {"products": [], "categories": []})
+
+
+@override_settings(COMPRESSED_IMAGE_QUEUE=False)
+class ImageVariantTests(MediaRootMixin, TestCase):
+    def test_variants_generated_on_upload(self):
+        banner = Banner.objects.create(title="Sale", sub_title="", image=make_upload(2400, 1200))
+        banner.refresh_from_db()
+
+        self.assertTrue(banner.image.name.endswith(".webp"))
+        self.assertEqual(
+            {label: (v["width"], v["height"]) for label, v in banner.image_variants.items()},
+            {"card": (480, 240), "detail": (1080, 540), "banner": (1920, 960)},
+        )
+        for variant in banner.image_variants.values():
+            with banner.image.storage.open(variant["files"]["webp"]) as file:
+                self.assertEqual(PilImage.open(file).width, variant["width"])
+
+        body = self.client.get("/api/v1/gyrat/banners/").json()[0]["image_variants"]
+        self.assertEqual(list(body["sizes"]), ["card", "detail", "banner"])
+        self.assertRegex(body["srcset"]["webp"], r"^http://testserver/media/banner/\S+-card\.webp 480w, ")
+
+    @mock.patch.object(CompressedImageSpec, "max_dimension", 1000)
+    def test_bounded_decode(self):
+        product = Product.objects.create(name="Rug", price=1, description="", image=make_upload(4000, 3000))
+        with product.image.open() as file:
+            self.assertEqual(PilImage.open(file).size, (1000, 750))
+        self.assertEqual(list(product.image_variants), ["thumbnail", "card"])
+
+    @mock.patch.object(CompressedImageSpec, "max_dimension", 1000)
+    @mock.patch.object(CompressedImageSpec, "max_pixels", 1_000_000)
+    def test_pixel_budget(self):
+        # JPEG decoding is scaled down by the decoder and fits the budget ...
+        product = Product(name="Rug", price=1, description="Wool", image=make_upload(4000, 3000))
+        product.full_clean()
+
+        # ... other formats would decode at full size and are refused.
+        output = BytesIO()
+        PilImage.new("RGB", (4000, 3000)).save(output, format="PNG")
+        product.image = SimpleUploadedFile("rug.png", output.getvalue(), content_type="image/png")
+        with self.assertRaisesMessage(ValidationError, "at most 1,000,000 pixels"):
+            product.full_clean()
+
+        # Saved outside a form, without the field validators.
+        product.image = SimpleUploadedFile("rug.png", output.getvalue(), content_type="image/png")
+        with self.assertRaises(ValidationError) as raised:
+            product.save()
+        self.assertIn("at most 1,000,000 pixels", raised.exception.message_dict["image"][0])
+
+    def test_small_images_are_not_upscaled(self):
+        product = Product.objects.create(name="Pin", price=1, description="", image=make_upload(300, 300))
+        self.assertEqual(list(product.image_variants), ["thumbnail"])
+
+
+@override_settings(COMPRESSED_IMAGE_QUEUE=True)
+class ImageQueueTests(MediaRootMixin, TestCase):
+    def test_original_stored_then_swapped_by_worker(self):
+        banner = Banner.objects.create(title="Sale", sub_title="", image=make_upload(2400, 1200))
+        original = banner.image.name
+        self.assertTrue(original.endswith(".jpg"))
+        self.assertEqual(banner.image_variants, {})
+        job = ImageJob.objects.get()
+        self.assertEqual((job.object_id, job.field_name, job.source), (banner.pk, "image", original))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("process_images", once=True, workers=1, stdout=StringIO())
+
+        banner.refresh_from_db()
+        self.assertTrue(banner.image.name.endswith(".webp"))
+        self.assertEqual(list(banner.image_variants), ["card", "detail", "banner"])
+        self.assertFalse(banner.image.storage.exists(original))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.result), (ImageJob.Status.DONE, 1, banner.image.name))
+
+    def test_replaced_upload_is_not_swapped(self):
+        banner = Banner.objects.create(title="Sale", sub_title="", image=make_upload())
+        banner.image = make_upload(name="second.jpg")
+        banner.save()
+
+        first, second = ImageJob.objects.order_by("id")
+        for job in imagejobs.claim(10):
+            _, result, error = imagejobs.process(*imagejobs.arguments(job))
+            imagejobs.finish(job, result)
+
+        banner.refresh_from_db()
+        self.assertEqual(banner.image.name, ImageJob.objects.get(pk=second.pk).result)
+        self.assertEqual(ImageJob.objects.get(pk=first.pk).result, "")
+
+    def test_failures_are_retried_then_given_up(self):
+        banner = Banner.objects.create(title="Sale", sub_title="", image=make_upload())
+        banner.image.storage.delete(banner.image.name)
+
+        for attempt in range(1, imagejobs.MAX_ATTEMPTS + 1):
+            ImageJob.objects.update(run_after=timezone.now())
+            [job] = imagejobs.claim(10)
+            _, result, error = imagejobs.process(*imagejobs.arguments(job))
+            self.assertIsNone(result)
+            imagejobs.fail(job, error)
+            self.assertEqual(job.attempts, attempt)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageJob.Status.FAILED)
+        self.assertIn("FileNotFoundError", job.last_error)
+        self.assertEqual(imagejobs.claim(10), [])
+
+
+@override_settings(COMPRESSED_IMAGE_QUEUE=False, COMPRESSED_IMAGE_DEDUPLICATE=True)
+class DeduplicationTests(MediaRootMixin, TestCase):
+    def create(self, upload):
+        return Product.objects.create(name="Shirt", price=1, description="", image=upload)
+
+    def refs(self):
+        return dict(StoredFile.objects.values_list("name", "refs"))
+
+    def test_same_upload_is_stored_and_compressed_once(self):
+        first = self.create(make_upload(1200, 800))
+        with mock.patch("apps.utils.fields.compress_image") as compress:
+            second = self.create(make_upload(1200, 800))
+        compress.assert_not_called()
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_variants, second.image_variants)
+        self.assertRegex(first.image.name, r"^product/[0-9a-f]{64}\.webp$")
+        # Main file plus thumbnail, card and detail variants, two users each.
+        self.assertEqual(set(self.refs().values()), {2})
+        self.assertEqual(len(self.refs()), 4)
+
+    def test_files_deleted_with_last_reference(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.create(make_upload())
+            second = self.create(make_upload())
+        storage, files = first.image.storage, list(self.refs())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(all(storage.exists(name) for name in files))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(self.refs(), {})
+        self.assertFalse(any(storage.exists(name) for name in files))
+
+    def test_replacing_releases_old_image(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self.create(make_upload(1200, 800))
+            old = product.image.name
+            product.image = make_upload(900, 600)
+            product.save()
+        self.assertNotIn(old, self.refs())
+        self.assertFalse(product.image.storage.exists(old))
+        self.assertEqual(self.refs()[product.image.name], 1)
+
+
+
+@override_settings(COMPRESSED_IMAGE_QUEUE=True, COMPRESSED_IMAGE_DEDUPLICATE=True)
+class QueuedDeduplicationTests(MediaRootMixin, TestCase):
+    def process(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("process_images", once=True, workers=1, stdout=StringIO())
+
+    def test_replacing_releases_old_image(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(name="Shirt", price=1, description="", image=make_upload(1200, 800))
+        self.process()
+        product.refresh_from_db()
+        storage = product.image.storage
+        old = dedup.image_files(product.image.name, product.image_variants)
+        self.assertEqual(set(StoredFile.objects.filter(name__in=old).values_list("refs", flat=True)), {1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.image = make_upload(900, 600)
+            product.save()
+        original = product.image.name
+        self.assertFalse(StoredFile.objects.filter(name__in=old).exists())
+        self.assertFalse(any(storage.exists(name) for name in old))
+
+        self.process()
+        product.refresh_from_db()
+        self.assertFalse(storage.exists(original))
+        new = dedup.image_files(product.image.name, product.image_variants)
+        self.assertEqual(dict(StoredFile.objects.values_list("name", "refs")), dict.fromkeys(new, 1))
+
+    def test_upload_replaced_before_processing_is_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(name="Shirt", price=1, description="", image=make_upload())
+            first = product.image.name
+            product.image = make_upload(name="second.jpg")
+            product.save()
+        self.process()
+        product.refresh_from_db()
+        self.assertFalse(product.image.storage.exists(first))
+        self.assertTrue(product.image.name.endswith(".webp"))
+
+
+class CatalogImportTests(MediaRootMixin, TestCase):
+    headers = ["id", "name", "price", "category", "description", "image"]
+
+    def setUp(self):
+        super().setUp()
+        self.shirts = Category.objects.create(name="Shirts", description="")
+        self.shoes = Category.objects.create(name="Shoes", description="")
+        self.boots = Product.objects.create(
+            name="Boots", price=80, category=self.shirts, description="", image="product/boots.webp",
+        )
+
+    def import_rows(self, rows):
+        dataset = Dataset(headers=self.headers)
+        for row in rows:
+            dataset.append(row)
+        with self.captureOnCommitCallbacks(execute=True):
+            return ProductResource().import_data(dataset, use_transactions=True)
+
+    def test_rows_are_matched_by_id_and_written_in_bulk(self):
+        rows = [["", f"Shirt {index}", index, self.shirts.pk, "", ""] for index in range(100)]
+        # Spreadsheets hand ids over as floats; names need not be unique.
+        rows += [[float(self.boots.pk), "Boots", "95.5", self.shoes.pk, "Leather", ""], ["", "Boots", 11, "", "", ""]]
+        with CaptureQueriesContext(connection) as queries:
+            result = self.import_rows(rows)
+
+        self.assertFalse(result.has_errors())
+        self.assertLess(len(queries), 40)
+        self.assertEqual(Product.objects.count(), 102)
+        self.boots.refresh_from_db()
+        self.assertEqual((self.boots.price, self.boots.category, self.boots.description), (95.5, self.shoes, "Leather"))
+        self.assertEqual(self.boots.image.name, "product/boots.webp")
+        self.assertEqual(Product.objects.filter(name="Boots").count(), 2)
+        # The rows sent no signals, the search index and read model follow anyway.
+        self.assertEqual(get_search_index().search("shirt 42", 5), [Product.objects.get(name="Shirt 42").pk])
+        entry = CatalogEntry.objects.get(kind=CatalogEntry.Kind.PRODUCT, object_id=self.boots.pk, language="tk")
+        self.assertEqual(json.loads(entry.data)["category"], self.shoes.pk)
+
+    def test_search_index_follows_per_product(self):
+        get_search_index().update(self.boots)
+        with mock.patch("apps.products.search.SqliteSearchIndex.rebuild") as rebuild:
+            self.import_rows([[self.boots.pk, "Sneakers", 60, self.shoes.pk, "", ""]])
+        rebuild.assert_not_called()
+        self.assertEqual(get_search_index().search("sneakers", 5), [self.boots.pk])
+        self.assertEqual(get_search_index().search("boots", 5), [])
+
+        with mock.patch.object(BulkCatalogResource._meta, "batch_size", 1), \
+                mock.patch("apps.products.search.SqliteSearchIndex.rebuild") as rebuild:
+            self.import_rows([["", "Sandals", 20, self.shoes.pk, "", ""], ["", "Slippers", 10, self.shoes.pk, "", ""]])
+        rebuild.assert_called_once()
+
+    def test_unknown_category_fails_the_import(self):
+        result = self.import_rows([["", "Hat", 5, self.shirts.pk + 100, "", ""]])
+        self.assertTrue(result.has_errors())
+        self.assertIn("does not exist", str(result.row_errors()[0][1][0].error))
+        self.assertFalse(Product.objects.filter(name="Hat").exists())
+
+    def test_unknown_or_repeated_ids_fail_the_import(self):
+        for rows in (
+            [[self.boots.pk + 100, "Hat", 5, "", "", ""]],
+            [[self.boots.pk, "Boots", 90, "", "", ""], [self.boots.pk, "Boots", 95, "", "", ""]],
+        ):
+            with self.subTest(rows=rows):
+                result = self.import_rows(rows)
+                self.assertTrue(result.has_errors())
+                self.assertEqual(Product.objects.get().price, 80)
+
+    def test_image_urls_are_fetched_by_the_worker(self):
+        url = "https://images.example.com/boots.jpg"
+        self.import_rows([[self.boots.pk, "Boots", 80, self.shirts.pk, "", url], ["", "Hat", 5, "", "", url]])
+        self.boots.refresh_from_db()
+        self.assertEqual((self.boots.image.name, self.boots.image_variants), ("", {}))
+        self.assertEqual(
+            sorted(ImageJob.objects.values_list("object_id", "source")),
+            sorted([(self.boots.pk, url), (Product.objects.get(name="Hat").pk, url)]),
+        )
+
+        upload = make_upload(1200, 800)
+        for job in imagejobs.claim(10):
+            with mock.patch("apps.utils.imagejobs.urlopen", return_value=BytesIO(upload.read())) as urlopen:
+                upload.seek(0)
+                _, result, error = imagejobs.process(*imagejobs.arguments(job))
+            self.assertIsNone(error)
+            self.assertEqual(urlopen.call_args[0][0].full_url, url)
+            imagejobs.finish(job, result)
+
+        self.boots.refresh_from_db()
+        self.assertRegex(self.boots.image.name, r"^product/.+\.webp$")
+        self.assertEqual(list(self.boots.image_variants), ["thumbnail", "card", "detail"])
+
+
+class CatalogExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        _make_catalog(categories=3, products=20, images=0)
+
+    def export(self, file_format):
+        fields = ["id", "name", "price", "category", "date_created"]
+        data = {"format": file_format, "resource": 0, **{f"productresource_{field}": "on" for field in fields}}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/admin/products/product/export/", data)
+            content = b"".join(response.streaming_content)
+        # One query for the rows, none per row.
+        self.assertEqual(len([query for query in queries if "products_" in query["sql"]]), 1)
+        return content
+
+    def test_csv_matches_the_dataset_export(self):
+        expected = ProductResource().export(
+            Product.objects.order_by("-date_created"), export_fields=["id", "name", "price", "category", "date_created"],
+        )
+        self.assertEqual(self.export(0).decode(), expected.csv)
+
+    @skipUnless(exports.openpyxl, "openpyxl is not installed")
+    def test_xlsx_keeps_cell_types(self):
+        sheet = exports.openpyxl.load_workbook(BytesIO(self.export(2)), read_only=True).active
+        header, *rows = sheet.iter_rows(values_only=True)
+        self.assertEqual(header, ("id", "date_created", "category", "name", "price"))
+        self.assertEqual(len(rows), 60)
+        newest = Product.objects.latest("date_created")
+        self.assertEqual((rows[0][0], *rows[0][2:]), (newest.pk, newest.category_id, newest.name, newest.price))
+        self.assertIsInstance(rows[0][1], datetime)
@@ -0,0 +1,35 @@
+from django.contrib import admin
+from unfold.admin import ModelAdmin as UnfoldAdmin
+
+from apps.utils import queue
+from apps.utils.models import ImageJob, OutgoingEmail
+
+
+class QueuedTaskAdmin(UnfoldAdmin):
+    """Read-only list of a worker's queue, failed tasks can be queued again."""
+
+    list_display = ['__str__', 'status', 'attempts', 'run_after', 'date_updated']
+    list_filter = ['status']
+    actions = ['retry']
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry selected %(verbose_name_plural)s")
+    def retry(self, request, queryset):
+        self.message_user(request, f"{queue.retry(queryset)} {self.model._meta.verbose_name}(s) queued again.")
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(QueuedTaskAdmin):
+    list_filter = ['status', 'content_type']
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(QueuedTaskAdmin):
+    search_fields = ['subject']
+    # Given-up messages lose their body, there is nothing left to send again.
+    actions = []
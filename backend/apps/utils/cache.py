@@ -0,0 +1,242 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+"""
+
+# Reads refresh an entry's LRU position at most this often, so hot keys do not
+# turn every get into a write.
+ACCESS_RESOLUTION = 1.0
+
+# Each process counts the entries only after writing this share of
+# MAX_ENTRIES, so the table overshoots it by at most that much per process.
+CULL_CHECK_SHARE = 0.01
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache shared by every process on the host, kept in an SQLite database in
+    WAL mode at ``LOCATION``: readers never block each other or the writer,
+    and nothing but a local file is needed.
+
+    Entries expire by timeout; past ``MAX_ENTRIES`` the expired and then the
+    least recently used ``1 / CULL_FREQUENCY`` of the entries are evicted,
+    checked once per ``CULL_CHECK_SHARE`` of ``MAX_ENTRIES`` written.
+    Plain integers are stored unpickled so ``incr`` is a single atomic UPDATE.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = os.fspath(location)
+        self._local = threading.local()
+        self._cull_every = max(1, int(self._max_entries * CULL_CHECK_SHARE))
+        self._unchecked = 0
+
+    @property
+    def connection(self):
+        # One connection per thread, and never one inherited across a fork.
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def close(self, **kwargs):
+        # Connections are kept for the life of the thread; they are cheap to hold.
+        pass
+
+    def encode(self, value):
+        return value if type(value) is int else pickle.dumps(value, self.pickle_protocol)
+
+    @staticmethod
+    def decode(value):
+        return value if isinstance(value, int) else pickle.loads(value)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        now = time.time()
+        rows = self.connection.execute(
+            f"SELECT key, value, accessed FROM cache WHERE key IN ({', '.join('?' * len(keys))}) "
+            f"AND (expires IS NULL OR expires > ?)",
+            [*keys, now],
+        ).fetchall()
+        stale = [(now, key) for key, _, accessed in rows if accessed < now - ACCESS_RESOLUTION]
+        if stale:
+            self.connection.executemany("UPDATE cache SET accessed = ? WHERE key = ?", stale)
+        return {keys[key]: self.decode(value) for key, value, _ in rows}
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self.connection.execute(
+            "SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)", [key, time.time()],
+        ).fetchone()
+        return row is not None
+
+    def _write(self, rows, timeout, mode="REPLACE"):
+        expires = self.get_backend_timeout(timeout)
+        if expires is not None and expires <= time.time():
+            # Django's convention: a non-positive timeout means "don't keep it".
+            self._delete([key for key, _ in rows])
+            return 0
+        now = time.time()
+        with self.transaction() as connection:
+            if mode == "ADD":
+                # Only an expired entry may be replaced by add().
+                connection.executemany(
+                    "DELETE FROM cache WHERE key = ? AND expires IS NOT NULL AND expires <= ?",
+                    [(key, now) for key, _ in rows],
+                )
+            before = connection.total_changes
+            connection.executemany(
+                f"INSERT OR {'IGNORE' if mode == 'ADD' else 'REPLACE'} INTO cache "
+                f"(key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                [(key, self.encode(value), expires, now) for key, value in rows],
+            )
+            written = connection.total_changes - before
+            self._unchecked += written
+            if self._unchecked >= self._cull_every:
+                self._unchecked = 0
+                self._cull(connection, now)
+        return written
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self._write([(key, value)], timeout, mode="ADD"))
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write([(self.make_and_validate_key(key, version=version), value)], timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if data:
+            self._write(
+                [(self.make_and_validate_key(key, version=version), value) for key, value in data.items()], timeout,
+            )
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self.connection.execute(
+            "UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            [self.get_backend_timeout(timeout), key, time.time()],
+        )
+        return bool(cursor.rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self.transaction() as connection:
+            row = connection.execute(
+                "UPDATE cache SET value = value + ?, accessed = ? "
+                "WHERE key = ? AND typeof(value) = 'integer' AND (expires IS NULL OR expires > ?) "
+                "RETURNING value",
+                [delta, now, key, now],
+            ).fetchall()
+            if row:
+                return row[0][0]
+            # Missing, or a pickled value: fall back to read, add and write back.
+            value = connection.execute(
+                "SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)", [key, now],
+            ).fetchone()
+            if value is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = self.decode(value[0]) + delta
+            connection.execute("UPDATE cache SET value = ?, accessed = ? WHERE key = ?", [self.encode(value), now, key])
+        return value
+
+    def transform(self, key, function, timeout=DEFAULT_TIMEOUT, version=None):
+        """Replace the value with ``function(value)`` (``None`` when missing) in one transaction."""
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self.transaction() as connection:
+            row = connection.execute(
+                "SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)", [key, now],
+            ).fetchone()
+            value = function(self.decode(row[0]) if row else None)
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                [key, self.encode(value), self.get_backend_timeout(timeout), now],
+            )
+        return value
+
+    def delete(self, key, version=None):
+        return bool(self.delete_many([key], version=version))
+
+    def delete_many(self, keys, version=None):
+        return self._delete([self.make_and_validate_key(key, version=version) for key in keys])
+
+    def _delete(self, keys):
+        if not keys:
+            return 0
+        cursor = self.connection.execute(f"DELETE FROM cache WHERE key IN ({', '.join('?' * len(keys))})", keys)
+        return cursor.rowcount
+
+    def clear(self):
+        self.connection.execute("DELETE FROM cache")
+
+    @contextmanager
+    def transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers
+        # wait out the busy timeout instead of failing to upgrade a read lock.
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _cull(self, connection, now):
+        (count,) = connection.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count <= self._max_entries:
+            return
+        count -= connection.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", [now]).rowcount
+        if count <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            connection.execute("DELETE FROM cache")
+            return
+        connection.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+            [count // self._cull_frequency],
+        )
+
+
+
+def transform(cache, key, function, timeout=DEFAULT_TIMEOUT):
+    """
+    ``cache.transform`` where the backend has it, atomic and one round trip;
+    a plain get and set elsewhere, where concurrent updates may be lost.
+    """
+    if hasattr(cache, "transform"):
+        return cache.transform(key, function, timeout)
+    value = function(cache.get(key))
+    cache.set(key, value, timeout)
+    return value
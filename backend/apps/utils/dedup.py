@@ -0,0 +1,84 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import StoredFile
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def enabled() -> bool:
+    return getattr(settings, "COMPRESSED_IMAGE_DEDUPLICATE", False)
+
+
+def file_digest(file) -> str:
+    """sha256 of an open file, leaving its position where it was."""
+    position = file.tell()
+    file.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(position)
+    return digest.hexdigest()
+
+
+def content_name(name: str, digest: str, ext: str) -> str:
+    """``name``'s directory, the content hash as file name."""
+    return os.path.join(os.path.dirname(name), f"{digest}.{ext}")
+
+
+def save_once(storage, name, content) -> str:
+    """Save unless a file with this (content-derived) name is already stored."""
+    if storage.exists(name):
+        return name
+    return storage.save(name, content)
+
+
+def image_files(name, variants) -> list[str]:
+    """Every stored file of an image: the compressed file and its variants."""
+    files = [name] if name else []
+    for variant in (variants or {}).values():
+        files.extend(variant["files"].values())
+    return files
+
+
+def lookup(source_hash, labels) -> StoredFile | None:
+    """A still referenced compression of the same upload with the same variants."""
+    return StoredFile.objects.filter(
+        source_hash=source_hash, labels=",".join(labels), refs__gt=0,
+    ).first()
+
+
+def remember(name, variants, source_hash, labels):
+    """Register a freshly written (or reused) image and its variants, unreferenced yet."""
+    StoredFile.objects.update_or_create(
+        name=name,
+        defaults={"source_hash": source_hash, "labels": ",".join(labels), "variants": variants},
+    )
+    for file in image_files(None, variants):
+        StoredFile.objects.get_or_create(name=file)
+
+
+def acquire(names):
+    if names:
+        StoredFile.objects.filter(name__in=names).update(refs=F("refs") + 1)
+
+
+def release(storage, names):
+    """Drop one reference to each file; files nobody uses any more are deleted."""
+    if not names:
+        return
+    with transaction.atomic():
+        StoredFile.objects.filter(name__in=names, refs__gt=0).update(refs=F("refs") - 1)
+        discard(storage, names)
+
+
+def discard(storage, names):
+    """Delete those of ``names`` that nothing references."""
+    unused = StoredFile.objects.filter(name__in=names, refs=0)
+    orphans = list(unused.values_list("name", flat=True))
+    unused.delete()
+    transaction.on_commit(lambda: [storage.delete(name) for name in orphans])
@@ -1,59 +1,299 @@
 import os
-from functools import wraps
+from functools import partial, wraps
+from tempfile import SpooledTemporaryFile
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.core.files.base import File
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 from django.db.models.fields.files import FieldFile
 from django.db.models.fields.related_descriptors import ManyToManyDescriptor
 from imagekit import ImageSpec
-from PIL import Image, UnidentifiedImageError
+from PIL import Image, ImageOps, UnidentifiedImageError, features
 
+from . import dedup
 from .files import upload_file
+from .models import ImageJob
 
 
 class CompressedImageSpec(ImageSpec):
     format = "WEBP"
     options = {"quality": 75}
 
+    # Named widths of the responsive variants, overridable with the
+    # COMPRESSED_IMAGE_WIDTHS setting.
+    widths = getattr(settings, "COMPRESSED_IMAGE_WIDTHS", {
+        "thumbnail": 160,
+        "card": 480,
+        "detail": 1080,
+        "banner": 1920,
+    })
+    # Variant formats, best first; formats this Pillow build cannot encode are skipped.
+    variant_formats = ("AVIF", "WEBP")
+
+    # Memory-bounded decoding: with COMPRESSED_IMAGE_MAX_DIMENSION set, images
+    # are decoded no larger than that longest edge (JPEGs are scaled by the
+    # decoder itself), and images that would still decode to more than
+    # COMPRESSED_IMAGE_MAX_PIXELS are refused before decoding.
+    max_dimension = getattr(settings, "COMPRESSED_IMAGE_MAX_DIMENSION", None)
+    max_pixels = getattr(settings, "COMPRESSED_IMAGE_MAX_PIXELS", Image.MAX_IMAGE_PIXELS)
+    # Encoded output is kept in memory up to this size, then spooled to disk.
+    spool_size = getattr(settings, "COMPRESSED_IMAGE_SPOOL_SIZE", 2 * 1024 * 1024)
+
+    @classmethod
+    def available_formats(cls):
+        return [fmt for fmt in cls.variant_formats if features.check(fmt.lower())]
+
+    @classmethod
+    def prepare(cls, image):
+        """Configure a just opened (not yet decoded) image for a bounded decode."""
+        if cls.max_dimension and max(image.size) > cls.max_dimension:
+            scale = cls.max_dimension / max(image.size)
+            image.draft(None, (max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+        if image.width * image.height > cls.max_pixels:
+            raise ImageTooLarge(
+                f"Image is too large ({image.width}x{image.height}), "
+                f"at most {cls.max_pixels:,} pixels are allowed."
+            )
+        return image
+
+    @classmethod
+    def open(cls, source):
+        image = cls.prepare(Image.open(source))
+        if cls.max_dimension and max(image.size) > cls.max_dimension:
+            image.thumbnail((cls.max_dimension, cls.max_dimension), Image.LANCZOS)
+        return image
+
+    @classmethod
+    def encode(cls, image, image_format):
+        output = SpooledTemporaryFile(max_size=cls.spool_size)
+        image.save(output, format=image_format, **cls.options)
+        output.seek(0)
+        return File(output)
+
+
+class ImageTooLarge(ValidationError):
+    pass
+
+
+def validate_image_pixels(value):
+    """Reject uploads over the pixel budget from the header alone."""
+    if getattr(value, "_committed", True):
+        return
+    check_pixels(getattr(value.file, "file", value.file))
+
+
+def check_pixels(source):
+    """Raise ``ImageTooLarge`` for an image in ``source`` over the pixel budget."""
+    position = source.tell()
+    try:
+        CompressedImageSpec.prepare(Image.open(source))
+    except UnidentifiedImageError:
+        pass
+    finally:
+        source.seek(position)
+
+
+def build_variants(storage, name, image, labels, save=None):
+    """
+    Save a resized copy of ``image`` per label in every available format next
+    to ``name`` and return their description for the variants field:
+    ``{label: {"width", "height", "files": {format: name}}}``.
+    Widths larger than the original are skipped, images are never upscaled.
+    """
+    save = save or storage.save
+    base_name, _ = os.path.splitext(name)
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    variants = {}
+    for label in labels:
+        width = CompressedImageSpec.widths[label]
+        if width >= image.width:
+            continue
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        files = {}
+        for image_format in CompressedImageSpec.available_formats():
+            ext = image_format.lower()
+            with CompressedImageSpec.encode(resized, image_format) as content:
+                files[ext] = save(f"{base_name}-{label}.{ext}", content)
+        variants[label] = {"width": width, "height": height, "files": files}
+    return variants
+
+
+def compress_image(storage, name, source, labels):
+    """
+    Compress the image in the open file ``source`` and build its variants;
+    returns the compressed file's name and the variants description.
+
+    ``name`` is where the upload would be stored. With deduplication the
+    compressed file is named after the hash of its bytes instead, in the same
+    directory, and files already stored under that name are reused.
+    """
+    image = CompressedImageSpec.open(source)
+    image_format = CompressedImageSpec.format
+    ext = image_format.lower()
+    save = partial(dedup.save_once, storage) if dedup.enabled() else storage.save
+
+    with CompressedImageSpec.encode(image, image_format) as content:
+        if dedup.enabled():
+            name = dedup.content_name(name, dedup.file_digest(content), ext)
+        else:
+            base_name, _ = os.path.splitext(name)
+            name = f"{base_name}.{ext}"
+        compressed_name = save(name, content)
+
+    variants = build_variants(storage, compressed_name, image, labels, save) if labels else {}
+    return compressed_name, variants
+
+
+def compress_stored(storage, name, labels):
+    """
+    Compress an original already saved as ``name`` and build its variants;
+    returns the compressed file's name, the variants description and the
+    original's hash. Used by the process_images worker, so it only touches
+    storage, never the database.
+    """
+    with storage.open(name) as source:
+        source_hash = dedup.file_digest(source) if dedup.enabled() else ""
+        compressed_name, variants = compress_image(storage, name, source, labels)
+    return compressed_name, variants, source_hash
+
 
 class CompressedImageFile(FieldFile):
     def save(self, name, content, save=True):
+        # Use the actual file object
+        source = getattr(content, "file", content)
+
+        # Check if it's GIF or SVG — skip compression
+        if name.lower().endswith((".gif", ".svg")):
+            super().save(name, content, save=False)
+            return self.saved({}, save)
+
         try:
-            # Use the actual file object
-            source = getattr(content, "file", content)
+            check_pixels(source)
+        except ImageTooLarge as error:
+            # Imports and the shell save without running the field validators.
+            raise ValidationError({self.field.name: error.messages}) from error
 
-            # Check if it's GIF or SVG — skip compression
-            if name.lower().endswith((".gif", ".svg")):
-                return super().save(name, content, save)
+        old_files = self.stored_files() if dedup.enabled() else []
+        if dedup.enabled():
+            source_hash = dedup.file_digest(source)
+            stored = dedup.lookup(source_hash, self.field.variants)
+            if stored is not None:
+                # Same upload seen before: reuse its compressed files.
+                self.adopt(stored.name)
+                return self.saved(stored.variants, save, old_files)
 
-            # Load image using Pillow
-            image = Image.open(source)
-            image_format = CompressedImageSpec.format
+        if getattr(settings, "COMPRESSED_IMAGE_QUEUE", False):
+            return self.save_original(name, content, save, old_files)
+
+        try:
+            compressed_name, variants = compress_image(
+                self.storage, self.field.generate_filename(self.instance, name), source, self.field.variants,
+            )
+        except UnidentifiedImageError:
+            super().save(name, content, save=False)
+            return self.saved({}, save)
 
-            compressed_image = ContentFile(b"")
-            image.save(compressed_image, format=image_format, quality=75)
+        self.adopt(compressed_name)
+        if dedup.enabled():
+            dedup.remember(compressed_name, variants, source_hash, self.field.variants)
+        return self.saved(variants, save, old_files)
 
-            base_name, _ = os.path.splitext(name)
-            name = f"{base_name}.{image_format.lower()}"
+    def adopt(self, name):
+        # FieldFile.save without writing: the file is already in storage.
+        self.name = name
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
 
-            return super().save(name, compressed_image, save)
+    def saved(self, variants, save, old_files=None):
+        if self.field.variants_field:
+            setattr(self.instance, self.field.variants_field, variants)
+        if old_files is not None:
+            # References are moved in CompressedMixin.update_refs after the instance is saved.
+            refs = self.instance.__dict__.setdefault("_image_refs", {})
+            refs[self.field.name] = (dedup.image_files(self.name, variants), old_files)
+        if save:
+            self.instance.save()
 
-        except UnidentifiedImageError:
-            pass
+    def stored_files(self):
+        """Files of the image currently saved in the database for this instance."""
+        if self.instance.pk is None:
+            return []
+        columns = [self.field.attname]
+        if self.field.variants_field:
+            columns.append(self.field.variants_field)
+        row = type(self.instance)._default_manager.filter(pk=self.instance.pk).values_list(*columns).first()
+        if row is None:
+            return []
+        return dedup.image_files(row[0], row[1] if len(row) > 1 else None)
 
-        return super().save(name, content, save)
+    def save_original(self, name, content, save, old_files=None):
+        # Stored as uploaded; CompressedMixin.enqueue creates the ImageJob
+        # once the instance is saved and has a primary key.
+        super().save(name, content, save=False)
+        self.instance.__dict__.setdefault("_queued_images", set()).add(self.field.name)
+        # The replaced image is released once the instance is saved; the
+        # worker's files are acquired when it swaps them in.
+        self.saved({}, save, old_files)
 
 
 class CompressedMixin:
     attr_class = CompressedImageFile
 
-    def __init__(self, upload_to=upload_file, **kwargs):
+    def __init__(self, upload_to=upload_file, variants=(), variants_field=None, **kwargs):
+        self.variants = tuple(variants)
+        self.variants_field = variants_field
         super().__init__(upload_to=upload_to, **kwargs)
 
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.variants:
+            kwargs["variants"] = self.variants
+        if self.variants_field:
+            kwargs["variants_field"] = self.variants_field
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        if not cls._meta.abstract:
+            post_save.connect(self.enqueue, sender=cls)
+            post_save.connect(self.update_refs, sender=cls)
+            post_delete.connect(self.release_refs, sender=cls)
+
+    def enqueue(self, instance, raw=False, using=None, **kwargs):
+        queued = instance.__dict__.get("_queued_images")
+        if raw or not queued or self.name not in queued:
+            return
+        queued.discard(self.name)
+        ImageJob.objects.using(using).create(
+            content_type=ContentType.objects.db_manager(using).get_for_model(instance),
+            object_id=instance.pk,
+            field_name=self.name,
+            source=getattr(instance, self.attname).name,
+        )
+
+    def update_refs(self, instance, raw=False, **kwargs):
+        refs = instance.__dict__.get("_image_refs")
+        if raw or not refs or self.name not in refs:
+            return
+        new_files, old_files = refs.pop(self.name)
+        dedup.acquire(new_files)
+        dedup.release(self.storage, old_files)
+
+    def release_refs(self, instance, **kwargs):
+        variants = getattr(instance, self.variants_field) if self.variants_field else None
+        dedup.release(self.storage, dedup.image_files(getattr(instance, self.attname).name, variants))
+
 
 class CompressedFileField(CompressedMixin, models.FileField):
     pass
 
 
 class CompressedImageField(CompressedMixin, models.ImageField):
-    pass
+    default_validators = [*models.ImageField.default_validators, validate_image_pixels]
@@ -0,0 +1,35 @@
+import time
+
+from django.core.cache import cache
+
+PREFIX = "generation"
+
+
+def key_for(model) -> str:
+    return f"{PREFIX}:{model._meta.label_lower}"
+
+
+def initial() -> int:
+    # Milliseconds, so a counter lost from the cache never restarts at a value
+    # that was already used for cached content.
+    return int(time.time() * 1000)
+
+
+def get_generations(models) -> tuple[int, ...]:
+    """Current generation of each model, in order, with one cache round trip."""
+    keys = [key_for(model) for model in models]
+    found = cache.get_many(keys)
+    missing = {key: initial() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return tuple(found[key] for key in keys)
+
+
+def bump(model) -> None:
+    """Invalidate everything cached under the current generation of ``model``."""
+    key = key_for(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, initial(), timeout=None)
@@ -0,0 +1,111 @@
+import os
+import traceback
+from datetime import timedelta
+from tempfile import SpooledTemporaryFile
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+from django.apps import apps
+from django.db import transaction
+
+from . import dedup, queue
+from .fields import CompressedImageSpec, compress_image, compress_stored
+from .models import ImageJob
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(seconds=30)
+# A job still "running" after this long belongs to a worker that died.
+STALE_AFTER = timedelta(minutes=10)
+# Remote sources (image URLs from catalog imports) are fetched with these limits.
+DOWNLOAD_TIMEOUT = 30
+MAX_DOWNLOAD_SIZE = 20 * 1024 * 1024
+
+
+def claim(limit: int) -> list[ImageJob]:
+    return queue.claim(ImageJob, limit, STALE_AFTER)
+
+
+def field_for(job):
+    model = job.content_type.model_class()
+    return model, model._meta.get_field(job.field_name)
+
+
+def arguments(job):
+    """Picklable description of ``job`` for ``process``."""
+    return job.pk, job.content_type.app_label, job.content_type.model, job.field_name, job.source
+
+
+def is_remote(source) -> bool:
+    """Jobs queued by imports carry the image's URL instead of a stored original."""
+    return source.startswith(("http://", "https://"))
+
+
+def compress_remote(model, field, url):
+    """
+    Download the image at ``url`` and compress it as an upload to ``field``
+    would be; returns what ``compress_stored`` does.
+    """
+    filename = os.path.basename(urlsplit(url).path)
+    name = field.generate_filename(model(), filename if "." in filename else "remote.jpg")
+    with SpooledTemporaryFile(max_size=CompressedImageSpec.spool_size) as source:
+        with urlopen(Request(url, headers={"User-Agent": "process_images"}), timeout=DOWNLOAD_TIMEOUT) as response:
+            while chunk := response.read(64 * 1024):
+                if source.tell() + len(chunk) > MAX_DOWNLOAD_SIZE:
+                    raise ValueError(f"{url} is larger than {MAX_DOWNLOAD_SIZE} bytes.")
+                source.write(chunk)
+        source.seek(0)
+        source_hash = dedup.file_digest(source) if dedup.enabled() else ""
+        compressed_name, variants = compress_image(field.storage, name, source, field.variants)
+    return compressed_name, variants, source_hash
+
+
+def process(job_id, app_label, model_name, field_name, source):
+    """Run in a pool process: the CPU-heavy part, no database access."""
+    try:
+        model = apps.get_model(app_label, model_name)
+        field = model._meta.get_field(field_name)
+        if is_remote(source):
+            return job_id, compress_remote(model, field, source), None
+        return job_id, compress_stored(field.storage, source, field.variants), None
+    except Exception:
+        return job_id, None, traceback.format_exc()
+
+
+def finish(job, result):
+    """Swap the compressed file in, unless the image was replaced meanwhile."""
+    model, field = field_for(job)
+    compressed_name, variants, source_hash = result
+    files = dedup.image_files(compressed_name, variants)
+    # Imports leave the field empty until the remote image is in.
+    expected = "" if is_remote(job.source) else job.source
+    with transaction.atomic():
+        if source_hash:
+            dedup.remember(compressed_name, variants, source_hash, field.variants)
+        instance = model._default_manager.select_for_update().filter(pk=job.object_id).first()
+        current = getattr(instance, field.attname).name if instance is not None else None
+        if current == expected:
+            setattr(instance, field.attname, compressed_name)
+            update_fields = [field.name]
+            if field.variants_field:
+                setattr(instance, field.variants_field, variants)
+                update_fields.append(field.variants_field)
+            if hasattr(instance, "date_updated"):
+                update_fields.append("date_updated")
+            instance.save(update_fields=update_fields)
+            dedup.acquire(files)
+        elif source_hash:
+            # Outdated upload: throw the work away, unless the files are shared.
+            dedup.discard(field.storage, files)
+        else:
+            transaction.on_commit(lambda: [field.storage.delete(name) for name in files])
+        if expected:
+            # Swapped out, or replaced before the worker got to it.
+            transaction.on_commit(lambda: field.storage.delete(job.source))
+        job.status = ImageJob.Status.DONE
+        job.result = compressed_name if current == expected else ""
+        job.last_error = ""
+        job.save(update_fields=["status", "result", "last_error", "date_updated"])
+
+
+def fail(job, error):
+    queue.fail(job, error, MAX_ATTEMPTS, RETRY_DELAY)
@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.utils.cache import SQLiteCache
+
+TABLE = "benchmark_cache"
+
+
+def make_cache(name, location):
+    if name == "locmem":
+        return LocMemCache("benchmark", {"OPTIONS": {"MAX_ENTRIES": 100_000}})
+    if name == "db":
+        return DatabaseCache(TABLE, {"OPTIONS": {"MAX_ENTRIES": 100_000}})
+    return SQLiteCache(location, {"OPTIONS": {"MAX_ENTRIES": 100_000}})
+
+
+def value(key):
+    # Shaped like a cached API response: content type and ~1 KiB of JSON.
+    return ("application/json", (f'{{"key": "{key}"}}' * 64).encode())
+
+
+def populate(cache, keys):
+    cache.set_many({f"key:{i}": value(i) for i in range(keys)})
+
+
+def work(name, location, keys, ops, write_ratio, queue):
+    # Fresh interpreter (spawn): locmem starts empty, as in a new worker.
+    import django
+
+    django.setup()
+    cache = make_cache(name, location)
+    rng = random.Random(os.getpid())
+    hits = gets = 0
+    started = time.perf_counter()
+    for _ in range(ops):
+        key = f"key:{rng.randrange(keys)}"
+        if rng.random() < write_ratio:
+            cache.set(key, value(key))
+        else:
+            gets += 1
+            hits += cache.get(key) is not None
+    queue.put((time.perf_counter() - started, hits, gets))
+
+
+class Command(BaseCommand):
+    help = "Compare the shared SQLite cache with the locmem and database caches across worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backends", nargs="+", default=["locmem", "db", "sqlite"],
+                            choices=["locmem", "db", "sqlite"])
+        parser.add_argument("--processes", type=int, nargs="+", default=[1, 4])
+        parser.add_argument("--keys", type=int, default=1000)
+        parser.add_argument("--ops", type=int, default=5000, help="Operations per process.")
+        parser.add_argument("--write-ratio", type=float, default=0.1)
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context("spawn")
+        with tempfile.TemporaryDirectory() as directory:
+            location = os.path.join(directory, "cache.sqlite3")
+            if "db" in options["backends"]:
+                call_command("createcachetable", TABLE)
+            try:
+                for name in options["backends"]:
+                    for processes in options["processes"]:
+                        cache = make_cache(name, location)
+                        cache.clear()
+                        # Written by this process, like a code stored by one gunicorn worker.
+                        populate(cache, options["keys"])
+                        queue = context.Queue()
+                        workers = [
+                            context.Process(target=work, args=(
+                                name, location, options["keys"], options["ops"], options["write_ratio"], queue,
+                            ))
+                            for _ in range(processes)
+                        ]
+                        started = time.perf_counter()
+                        for worker in workers:
+                            worker.start()
+                        results = [queue.get() for _ in workers]
+                        for worker in workers:
+                            worker.join()
+                        wall = time.perf_counter() - started
+
+                        busy = sum(elapsed for elapsed, _, _ in results)
+                        hits = sum(hits for _, hits, _ in results)
+                        gets = sum(gets for _, _, gets in results)
+                        total = options["ops"] * processes
+                        self.stdout.write(
+                            f"{name:>7} x{processes}: {total / max(elapsed for elapsed, _, _ in results):>9,.0f} ops/s, "
+                            f"{busy / total * 1e6:6.1f} us/op, hit rate {hits / max(gets, 1):6.1%} "
+                            f"({wall:.2f}s wall)"
+                        )
+            finally:
+                if "db" in options["backends"]:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"DROP TABLE {connection.ops.quote_name(TABLE)}")
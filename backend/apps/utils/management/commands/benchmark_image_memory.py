@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def full_resolution(path):
+    # CompressedImageFile.save before memory-bounded decoding.
+    image = Image.open(path)
+    output = BytesIO()
+    image.save(output, format="WEBP", quality=75)
+    return image.size, output.tell()
+
+
+def bounded(path, max_dimension, max_pixels):
+    from apps.utils.fields import CompressedImageSpec
+
+    CompressedImageSpec.max_dimension = max_dimension
+    CompressedImageSpec.max_pixels = max_pixels
+    with open(path, "rb") as source:
+        image = CompressedImageSpec.open(source)
+        with CompressedImageSpec.encode(image, CompressedImageSpec.format) as output:
+            return image.size, output.size
+
+
+def measure(name, path, queue, *args):
+    # Fresh interpreter (spawn): the parent's memory does not count.
+    import django
+
+    django.setup()
+    func = {"full": full_resolution, "bounded": bounded}[name]
+    before = peak_rss_kb()
+    started = time.perf_counter()
+    size, encoded = func(path, *args)
+    queue.put((name, size, encoded, before, peak_rss_kb(), time.perf_counter() - started))
+
+
+class Command(BaseCommand):
+    help = "Compare peak RSS of full-resolution and memory-bounded upload compression."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--megapixels", type=float, default=40)
+        parser.add_argument("--format", default="JPEG", choices=["JPEG", "PNG"])
+        parser.add_argument("--max-dimension", type=int, default=2560)
+        parser.add_argument("--max-pixels", type=int, default=24_000_000)
+
+    def handle(self, *args, **options):
+        width = int((options["megapixels"] * 1_000_000 * 4 / 3) ** 0.5)
+        height = width * 3 // 4
+        suffix = ".jpg" if options["format"] == "JPEG" else ".png"
+
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as source:
+            path = source.name
+        try:
+            # A gradient compresses like a photo far better than flat colour.
+            Image.linear_gradient("L").resize((width, height)).convert("RGB").save(path, options["format"])
+            self.stdout.write(f"Source: {width}x{height} {options['format']}, {os.path.getsize(path) / 2**20:.1f} MiB")
+
+            context = multiprocessing.get_context("spawn")
+            queue = context.Queue()
+            runs = [
+                ("full", ()),
+                ("bounded", (options["max_dimension"], options["max_pixels"])),
+            ]
+            for name, extra in runs:
+                process = context.Process(target=measure, args=(name, path, queue, *extra))
+                process.start()
+                process.join()
+                if process.exitcode:
+                    self.stderr.write(self.style.ERROR(f"{name}: failed (exit code {process.exitcode})"))
+                    continue
+                name, size, encoded, before, peak, elapsed = queue.get()
+                self.stdout.write(
+                    f"{name:>8}: output {size[0]}x{size[1]} {encoded / 1024:.0f} KiB, "
+                    f"peak RSS {peak / 1024:.0f} MiB (+{(peak - before) / 1024:.0f} MiB), {elapsed:.2f}s"
+                )
+        finally:
+            os.unlink(path)
@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.utils import imagejobs
+from apps.utils.models import ImageJob
+
+
+class Command(BaseCommand):
+    help = "Compress queued image uploads and build their variants in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Pool size, defaults to the CPU count.")
+        parser.add_argument("--batch", type=int, default=20, help="Jobs claimed per round.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty.")
+
+    def handle(self, *args, **options):
+        # Pool processes are forked from here and must not share its connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            while True:
+                jobs = {job.pk: job for job in imagejobs.claim(options["batch"])}
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+
+                calls = [imagejobs.arguments(job) for job in jobs.values()]
+                for job_id, result, error in pool.map(imagejobs.process, *zip(*calls)):
+                    self.report(jobs[job_id], result, error)
+
+    def report(self, job, result, error):
+        if error is None:
+            try:
+                imagejobs.finish(job, result)
+            except Exception as exc:
+                error = repr(exc)
+        if error is None:
+            self.stdout.write(f"{job}")
+            return
+        imagejobs.fail(job, error)
+        style = self.style.ERROR if job.status == ImageJob.Status.FAILED else self.style.WARNING
+        self.stderr.write(style(f"{job} (attempt {job.attempts})"))
@@ -0,0 +1,51 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from apps.utils import outbox
+from apps.utils.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails in batches over one long-lived SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=50, help="Messages claimed per round.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the outbox is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit when the outbox is empty.")
+
+    def handle(self, *args, **options):
+        connection = get_connection(fail_silently=False)
+        try:
+            while True:
+                emails = outbox.claim(options["batch"])
+                if not emails:
+                    # Don't hold an idle connection open until the server drops it.
+                    connection.close()
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+                self.send(connection, emails)
+        finally:
+            connection.close()
+
+    def send(self, connection, emails):
+        try:
+            connection.open()
+            errors = outbox.deliver(emails, connection)
+        except Exception as exc:
+            # Could not even connect: the whole batch waits for the next attempt.
+            connection.close()
+            errors = {email.pk: repr(exc) for email in emails}
+
+        outbox.sent([email for email in emails if email.pk not in errors])
+        outbox.prune()
+        for email in emails:
+            if email.pk not in errors:
+                self.stdout.write(f"{email}")
+                continue
+            outbox.fail(email, errors[email.pk])
+            style = self.style.ERROR if email.status == OutgoingEmail.Status.FAILED else self.style.WARNING
+            self.stderr.write(style(f"{email} (attempt {email.attempts}): {errors[email.pk]}"))
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refs', models.PositiveIntegerField(default=0)),
+                ('source_hash', models.CharField(blank=True, max_length=64)),
+                ('labels', models.CharField(blank=True, max_length=255)),
+                ('variants', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['source_hash', 'labels'], name='storedfile_source_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+# OutgoingEmail statuses renamed to those of every QueuedTask.
+RENAMED = {"sending": "running", "sent": "done"}
+
+
+def rename_statuses(apps, schema_editor):
+    OutgoingEmail = apps.get_model("utils", "OutgoingEmail")
+    for old, new in RENAMED.items():
+        OutgoingEmail.objects.filter(status=old).update(status=new)
+
+
+def restore_statuses(apps, schema_editor):
+    OutgoingEmail = apps.get_model("utils", "OutgoingEmail")
+    for old, new in RENAMED.items():
+        OutgoingEmail.objects.filter(status=new).update(status=old)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0003_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outgoingemail',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.RunPython(rename_statuses, restore_statuses),
+    ]
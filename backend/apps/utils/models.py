@@ -1,4 +1,6 @@
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
 
 class BaseModel(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
@@ -7,3 +9,71 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
         ordering = ['-date_created']
+
+
+class QueuedTask(BaseModel):
+    """A row of a worker's queue, see apps.utils.queue."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        abstract = True
+        ordering = ['-date_created']
+        indexes = [models.Index(fields=['status', 'run_after'], name='%(class)s_queue_idx')]
+
+
+class ImageJob(QueuedTask):
+    """An uploaded original waiting to be compressed by the process_images worker."""
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    field_name = models.CharField(max_length=100)
+    source = models.CharField(max_length=255)
+    result = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return f"{self.content_type.model} {self.object_id}.{self.field_name}: {self.status}"
+
+
+class StoredFile(models.Model):
+    """
+    A content-addressed media file and the number of model fields using it.
+
+    Rows for compressed images also remember which upload (``source_hash``)
+    and variant set (``labels``) produced them, so the same upload is never
+    compressed twice.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    refs = models.PositiveIntegerField(default=0)
+    source_hash = models.CharField(max_length=64, blank=True)
+    labels = models.CharField(max_length=255, blank=True)
+    variants = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['source_hash', 'labels'], name='storedfile_source_idx')]
+
+    def __str__(self):
+        return f"{self.name} ({self.refs})"
+
+
+class OutgoingEmail(QueuedTask):
+    """A message waiting to be delivered by the send_emails worker."""
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"{', '.join(self.to)}: {self.subject}"
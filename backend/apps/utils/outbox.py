@@ -0,0 +1,94 @@
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.utils import timezone
+
+from . import queue
+from .models import OutgoingEmail
+
+MAX_ATTEMPTS = 6
+RETRY_DELAY = timedelta(seconds=30)
+# A message still "running" after this long belongs to a worker that died.
+STALE_AFTER = timedelta(minutes=10)
+# Delivered messages stay listed in the admin this long, without their content.
+DONE_RETENTION = timedelta(days=7)
+# Errors that mean the connection itself is gone, not that the message was refused.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def enqueue(subject, body, to, html_message="", from_email=None) -> OutgoingEmail:
+    """Store a message for the send_emails worker instead of sending it inline."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_message or "",
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+    )
+
+
+def claim(limit: int) -> list[OutgoingEmail]:
+    return queue.claim(OutgoingEmail, limit, STALE_AFTER)
+
+
+def message(email, connection=None) -> EmailMultiAlternatives:
+    result = EmailMultiAlternatives(email.subject, email.body, email.from_email, email.to, connection=connection)
+    if email.html_body:
+        result.attach_alternative(email.html_body, "text/html")
+    return result
+
+
+def deliver(emails, connection):
+    """
+    Send ``emails`` over the already open ``connection``, one message at a
+    time so a refused recipient fails only its own message. A dropped
+    connection is reopened once per message. Returns ``{pk: error}`` for the
+    messages that could not be sent; if the server can't be reached again,
+    that is every message from the dropped one on, the earlier ones were sent.
+    """
+    errors = {}
+    emails = list(emails)
+    for position, email in enumerate(emails):
+        for reconnect in (True, False):
+            try:
+                connection.send_messages([message(email, connection)])
+                break
+            except CONNECTION_ERRORS as exc:
+                connection.close()
+                if not reconnect:
+                    errors[email.pk] = repr(exc)
+                    break
+                try:
+                    connection.open()
+                except Exception as exc:
+                    connection.close()
+                    errors.update((pending.pk, repr(exc)) for pending in emails[position:])
+                    return errors
+            except Exception as exc:
+                errors[email.pk] = repr(exc)
+                break
+    return errors
+
+
+def sent(emails):
+    # Bodies carry verification codes: none is kept once delivered.
+    OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+        status=OutgoingEmail.Status.DONE, body="", html_body="", last_error="", date_updated=timezone.now(),
+    )
+
+
+def fail(email, error):
+    queue.fail(email, error, MAX_ATTEMPTS, RETRY_DELAY)
+    if email.status == OutgoingEmail.Status.FAILED:
+        email.body = email.html_body = ""
+        email.save(update_fields=["body", "html_body"])
+
+
+def prune() -> int:
+    """Delete the messages delivered more than ``DONE_RETENTION`` ago."""
+    deleted, _ = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.Status.DONE, date_updated__lt=timezone.now() - DONE_RETENTION,
+    ).delete()
+    return deleted
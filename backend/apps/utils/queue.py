@@ -0,0 +1,49 @@
+"""
+The work queues of the process_images and send_emails workers: rows of a
+``QueuedTask`` model, claimed by one worker at a time, retried with
+exponential backoff and given up after a number of attempts.
+"""
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+def claim(model, limit: int, stale_after) -> list:
+    """
+    Mark up to ``limit`` due tasks as running for this worker and return
+    them. A task still running after ``stale_after`` belongs to a worker
+    that died and is due again.
+    """
+    now = timezone.now()
+    due = (
+        Q(status=model.Status.PENDING, run_after__lte=now)
+        | Q(status=model.Status.RUNNING, date_updated__lt=now - stale_after)
+    )
+    claimed = []
+    for task in model.objects.filter(due).order_by("run_after", "id")[:limit]:
+        # Conditional update so two workers never run the same task.
+        taken = model.objects.filter(pk=task.pk, status=task.status, date_updated=task.date_updated).update(
+            status=model.Status.RUNNING, attempts=F("attempts") + 1, date_updated=now,
+        )
+        if taken:
+            task.refresh_from_db()
+            claimed.append(task)
+    return claimed
+
+
+def fail(task, error, max_attempts: int, retry_delay) -> None:
+    """Schedule a retry with exponential backoff, or give up after ``max_attempts``."""
+    task.last_error = error
+    if task.attempts >= max_attempts:
+        task.status = task.Status.FAILED
+    else:
+        task.status = task.Status.PENDING
+        task.run_after = timezone.now() + retry_delay * 2 ** (task.attempts - 1)
+    task.save(update_fields=["status", "last_error", "run_after", "date_updated"])
+
+
+def retry(queryset) -> int:
+    """Queue the tasks again from their first attempt, except those running right now."""
+    return queryset.exclude(status=queryset.model.Status.RUNNING).update(
+        status=queryset.model.Status.PENDING, attempts=0, run_after=timezone.now(), last_error="",
+    )
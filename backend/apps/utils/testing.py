@@ -0,0 +1,61 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Keeps the files the code writes out of the project: the SQLite cache,
+    which tests clear, and catalog snapshots go to a temporary directory
+    for the run.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.scratch = Path(tempfile.mkdtemp(prefix="gyrat-tests-"))
+        caches = {
+            alias: {**config, "LOCATION": self.scratch / f"{alias}.sqlite3"}
+            if config["BACKEND"] == "apps.utils.cache.SQLiteCache" else config
+            for alias, config in settings.CACHES.items()
+        }
+        self.isolated = override_settings(CACHES=caches, CATALOG_SNAPSHOT_ROOT=self.scratch / "catalog")
+        self.isolated.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.isolated.disable()
+        shutil.rmtree(self.scratch, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
+
+class QueryCountMixin:
+    """TestCase helpers for catching N+1 queries on API endpoints."""
+
+    def assertConstantQueries(self, path, grow, num=None, **extra):
+        """
+        Request ``path`` before and after calling ``grow()`` (which should add
+        rows the endpoint renders) and check the query count did not change.
+        When ``num`` is given the count must also be exactly ``num``.
+        """
+        with CaptureQueriesContext(connection) as before:
+            response = self.client.get(path, **extra)
+        self.assertEqual(response.status_code, 200)
+
+        grow()
+
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(path, **extra)
+        self.assertEqual(response.status_code, 200)
+
+        queries = "\n".join(query["sql"] for query in after.captured_queries)
+        self.assertEqual(
+            len(before), len(after),
+            f"{path} ran {len(before)} queries, then {len(after)} after growing:\n{queries}",
+        )
+        if num is not None:
+            self.assertEqual(len(after), num, f"{path} ran {len(after)} queries:\n{queries}")
+        return response
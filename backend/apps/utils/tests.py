@@ -0,0 +1,178 @@
+import multiprocessing
+import os
+import smtplib
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from apps.utils import outbox
+from apps.utils.cache import SQLiteCache
+from apps.utils.models import OutgoingEmail
+
+
+def set_in_child(location, key, value):
+    SQLiteCache(location, {}).set(key, value)
+
+
+def incr_in_child(location, key, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr(key)
+
+
+def append_in_child(location, key, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.transform(key, lambda value: (value or ()) + (os.getpid(),))
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, "cache.sqlite3")
+        self.cache = SQLiteCache(self.location, {"OPTIONS": {"MAX_ENTRIES": 10, "CULL_FREQUENCY": 2}})
+
+    def run_children(self, target, *args, processes=1):
+        context = multiprocessing.get_context("fork")
+        children = [context.Process(target=target, args=(self.location, *args)) for _ in range(processes)]
+        for child in children:
+            child.start()
+        for child in children:
+            child.join()
+            self.assertEqual(child.exitcode, 0)
+
+    def test_values_round_trip(self):
+        self.cache.set_many({"int": 1, "bool": True, "tuple": ("application/json", b"{}")})
+        self.assertEqual(
+            self.cache.get_many(["int", "bool", "tuple", "missing"]),
+            {"int": 1, "bool": True, "tuple": ("application/json", b"{}")},
+        )
+        self.assertIs(self.cache.get("bool"), True)
+        self.assertFalse(self.cache.add("int", 2))
+        self.assertTrue(self.cache.delete("int"))
+        self.assertTrue(self.cache.add("int", 2))
+
+    def test_timeouts(self):
+        self.cache.set("short", 1, timeout=0.05)
+        self.cache.set("never", 1, timeout=None)
+        self.cache.set("gone", 1, timeout=0)
+        self.assertTrue(self.cache.has_key("short"))
+        self.assertFalse(self.cache.has_key("gone"))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("short"))
+        self.assertTrue(self.cache.add("short", 2))
+        self.assertEqual(self.cache.get("never"), 1)
+
+    def test_incr(self):
+        self.cache.set("counter", 1)
+        self.assertEqual(self.cache.incr("counter", 5), 6)
+        self.cache.set("float", 1.5)
+        self.assertEqual(self.cache.incr("float"), 2.5)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+
+    def test_evicts_least_recently_used(self):
+        for i in range(10):
+            self.cache.set(f"key{i}", i)
+        self.cache.connection.execute("UPDATE cache SET accessed = accessed - 10")
+        self.cache.get("key0")
+        self.cache.set("key10", 10)
+        self.assertEqual(self.cache.get("key0"), 0)
+        self.assertEqual(self.cache.get("key10"), 10)
+        self.assertIsNone(self.cache.get("key1"))
+        (count,) = self.cache.connection.execute("SELECT COUNT(*) FROM cache").fetchone()
+        self.assertLessEqual(count, 10)
+
+    def test_counts_entries_once_per_share_of_max_entries(self):
+        cache = SQLiteCache(self.location, {"OPTIONS": {"MAX_ENTRIES": 1000}})
+        statements = []
+        cache.connection.set_trace_callback(statements.append)
+        for i in range(25):
+            cache.set(f"key{i}", i)
+        self.assertEqual(len([sql for sql in statements if "COUNT(*)" in sql]), 2)
+
+    def test_shared_between_processes(self):
+        self.run_children(set_in_child, "verification_user@example.com", "123456")
+        self.assertEqual(self.cache.get("verification_user@example.com"), "123456")
+
+        self.cache.set("generation", 0)
+        self.run_children(incr_in_child, "generation", 50, processes=4)
+        self.assertEqual(self.cache.get("generation"), 200)
+
+    def test_transform_is_atomic(self):
+        self.assertEqual(self.cache.transform("items", lambda value: value or ()), ())
+        self.run_children(append_in_child, "items", 25, processes=4)
+        self.assertEqual(len(self.cache.get("items")), 100)
+
+
+class OutboxTests(TestCase):
+    def send(self):
+        call_command("send_emails", once=True, stdout=StringIO(), stderr=StringIO())
+
+    def test_batches_share_one_connection(self):
+        for i in range(5):
+            outbox.enqueue("Subject", "Body", [f"user{i}@example.com"])
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.open") as opened:
+            call_command("send_emails", once=True, batch=2, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(opened.call_count, 3)
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.Status.DONE).exists())
+
+    def test_delivered_messages_are_emptied_then_pruned(self):
+        old = outbox.enqueue("Code", "123456", ["old@example.com"], html_message="<p>123456</p>")
+        self.send()
+        old.refresh_from_db()
+        self.assertEqual((old.status, old.body, old.html_body), (OutgoingEmail.Status.DONE, "", ""))
+
+        OutgoingEmail.objects.update(date_updated=timezone.now() - outbox.DONE_RETENTION - timedelta(minutes=1))
+        outbox.enqueue("Code", "654321", ["new@example.com"])
+        self.send()
+        self.assertEqual(list(OutgoingEmail.objects.values_list("to", flat=True)), [["new@example.com"]])
+
+    def test_reconnects_once_after_a_dropped_connection(self):
+        outbox.enqueue("Subject", "Body", ["user@example.com"])
+        send_messages = mock.Mock(side_effect=[smtplib.SMTPServerDisconnected(), 1])
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", send_messages):
+            self.send()
+        self.assertEqual(send_messages.call_count, 2)
+        self.assertEqual(OutgoingEmail.objects.get().status, OutgoingEmail.Status.DONE)
+
+    def test_failed_reconnect_keeps_messages_already_sent(self):
+        first = outbox.enqueue("Subject", "Body", ["first@example.com"])
+        second = outbox.enqueue("Subject", "Body", ["second@example.com"])
+        send_messages = mock.Mock(side_effect=[1, smtplib.SMTPServerDisconnected()])
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", send_messages), \
+                mock.patch("django.core.mail.backends.locmem.EmailBackend.open", side_effect=[None, ConnectionRefusedError()]):
+            self.send()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.status, OutgoingEmail.Status.DONE)
+        self.assertEqual(second.status, OutgoingEmail.Status.PENDING)
+        self.assertIn("ConnectionRefusedError", second.last_error)
+
+    def test_failures_back_off_then_give_up(self):
+        email = outbox.enqueue("Subject", "Body", ["user@example.com"])
+        refused = smtplib.SMTPRecipientsRefused({"user@example.com": (550, b"No such user")})
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=refused):
+            delays = []
+            for attempt in range(1, outbox.MAX_ATTEMPTS + 1):
+                OutgoingEmail.objects.update(run_after=timezone.now())
+                started = timezone.now()
+                self.send()
+                email.refresh_from_db()
+                self.assertEqual(email.attempts, attempt)
+                delays.append(email.run_after - started)
+
+        self.assertEqual(email.status, OutgoingEmail.Status.FAILED)
+        self.assertEqual((email.body, email.html_body), ("", ""))
+        self.assertIn("SMTPRecipientsRefused", email.last_error)
+        self.assertGreater(delays[2], delays[1] * 1.9)
+        self.assertEqual(mail.outbox, [])
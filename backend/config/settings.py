@@ -58,6 +58,7 @@ INSTALLED_APPS = [
     'drf_spectacular',
     "rest_framework",
     'drf_spectacular_sidecar',
+    "apps.utils",
     "apps.products",
     "apps.contact",
     'import_export',
@@ -160,21 +161,66 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "static"
+# Static catalog JSON written by build_catalog_snapshot (--watch republishes it
+# after catalog changes): <root>/current/<lang>/{categories,products,banners}.json
+# plus .gz/.br next to them, for the web server to serve with
+# gzip_static/brotli_static. Outside STATIC_ROOT, which collectstatic --clear empties.
+CATALOG_SNAPSHOT_ROOT = BASE_DIR / "catalog_snapshot"
+# Prefix of media URLs in the snapshot; empty keeps them site-relative.
+CATALOG_SNAPSHOT_BASE_URL = ""
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Compress uploaded images and build their variants in the process_images
+# worker instead of the admin request; the original is served until then.
+COMPRESSED_IMAGE_QUEUE = True
+# Decode uploads at most this large (longest edge) and refuse anything that
+# would still decode to more pixels than the budget.
+COMPRESSED_IMAGE_MAX_DIMENSION = 2560
+COMPRESSED_IMAGE_MAX_PIXELS = 24_000_000
+# Name compressed images after their content hash, share identical files
+# between records and never compress the same upload twice.
+COMPRESSED_IMAGE_DEDUPLICATE = True
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Sends files the tests write as a side effect to a temporary directory.
+TEST_RUNNER = "apps.utils.testing.TestRunner"
+
 
 
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'api.products.pagination.KeysetPagination',
+    # orjson when installed, DRF's stdlib JSON otherwise (api.products.renderers).
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.products.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.products.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'PAGE_SIZE': 20,
+    # Contact endpoints (api.products.throttling): token buckets per client IP
+    # and per address for sending codes, and a sliding window on code
+    # attempts per address against brute force. "<num>/[<n>]<s|m|h|d>".
+    'DEFAULT_THROTTLE_RATES': {
+        'contact_ip': '20/hour',
+        'contact_email': '3/hour',
+        'verify_ip': '30/hour',
+        'verify_email': '5/10m',
+    },
+    # Throttles key clients on REMOTE_ADDR, never on an X-Forwarded-For the
+    # client wrote itself. Behind reverse proxies, set this to their number.
+    'NUM_PROXIES': 0,
 }
 
 
@@ -214,11 +260,24 @@ DEFAULT_FROM_EMAIL = 'dayanchkemalovich@gmail.com'
 
 
 
+# Shared by all worker processes on the host (verification codes, throttles,
+# generation counters); see apps.utils.cache and the benchmark_cache command.
+# Rendered API responses have their own, so culling them never evicts codes.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
+        'BACKEND': 'apps.utils.cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache.sqlite3',
+        'OPTIONS': {
+            'MAX_ENTRIES': 50_000,
+        },
+    },
+    'responses': {
+        'BACKEND': 'apps.utils.cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'responses.sqlite3',
+        'OPTIONS': {
+            'MAX_ENTRIES': 20_000,
+        },
+    },
 }
 
 
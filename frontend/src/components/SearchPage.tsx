@@ -15,7 +15,7 @@ const SearchPage: React.FC = () => {
         queryKey: ['search', query],
         queryFn: async () => {
             if (!query) return [];
-            const response = await api.get(`products/?search=${query}`);
+            const response = await api.get(`products/?search=${query}&fields=id,name,description,price`);
             return response.data || [];
         },
         enabled: !!query,